@@ -1,5 +1,8 @@
 from agno.agent import Agent
-from agno.models.groq import Groq
+from agents.llm_pool import get_llm_registry
+from agents.response_cache import RESPONSE_CACHE_ENABLED, get_response_cache, response_key
+from agents.singleflight import get_flight
+import asyncio
 import os
 
 
@@ -9,12 +12,112 @@ class BaseAgent:
         self.name = name
         self.description = description
         self.avatar = avatar
-        self.model = Groq(id="llama-3.3-70b-versatile")
+        # Own model object, but the HTTP clients and their warm connections are shared process-wide
+        self.model = get_llm_registry().model()
         self.agent = Agent(model=self.model, markdown=True)
         
-    def get_response(self, query, stream=False):
-        response = self.agent.run(query, stream=stream)
-        return response.content
+    def get_response(self, query, stream=False, cache_ttl=None):
+        """Full response text; with cache_ttl (seconds) identical prompts are answered from the response cache"""
+        if stream:
+            return "".join(self.stream_response(query, cache_ttl))
+        key = self.response_key(query)
+        if self._cacheable(cache_ttl):
+            cached = self._cached(key, query, cache_ttl)
+            if cached is not None:
+                return cached
+
+        def generate():
+            # Per-call Agent with an explicit stream=False: agno keeps a shared Agent streaming once
+            # it has streamed, and concurrent Flask threads would share its run state
+            return self.run_agent().run(query, stream=False).content
+
+        # Identical prompts already in flight on other threads wait for that call instead of sending their own
+        content = get_flight("llm").do(key, generate)
+        if self._cacheable(cache_ttl) and content:
+            get_response_cache().put(key, content, cache_ttl)
+        return content
+
+    def stream_response(self, query, cache_ttl=None):
+        """Yield the response text piece by piece as the model generates it"""
+        key = self.response_key(query) if self._cacheable(cache_ttl) else None
+        cached = self._cached(key, query, cache_ttl) if key else None
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        # Per-call Agent: agno keeps stream=True on an Agent once it has streamed, which would turn
+        # every later blocking run() on a shared Agent into a generator
+        for chunk in self.run_agent().run(query, stream=True):
+            if isinstance(chunk.content, str) and chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+        if key and parts:
+            get_response_cache().put(key, "".join(parts), cache_ttl)
+
+    def generation_params(self):
+        """Everything besides the prompt that changes what the model returns"""
+        params = {
+            name: getattr(self.model, name, None)
+            for name in ("temperature", "top_p", "max_tokens", "seed", "frequency_penalty", "presence_penalty", "stop")
+        }
+        params["markdown"] = self.agent.markdown
+        return params
+
+    def response_key(self, query):
+        """Fingerprint of a request: model, normalised prompt and generation parameters"""
+        return response_key(self.model.id, query, self.generation_params())
+
+    def _cacheable(self, cache_ttl):
+        return bool(cache_ttl) and RESPONSE_CACHE_ENABLED
+
+    def _cached(self, key, query, cache_ttl):
+        """Cached response or None; a stale hit is served while it is refreshed in the background"""
+        cache = get_response_cache()
+        cached = cache.get(key)
+        if cached is None:
+            return None
+        content, fresh = cached
+        if not fresh:
+            def generate():
+                return self.run_agent().run(query, stream=False).content
+
+            cache.refresh(key, lambda: get_flight("llm").do(key, generate), cache_ttl)
+        return content
+
+    def run_agent(self):
+        """A fresh Agent on the shared model; concurrent runs must not share one Agent's run state"""
+        return Agent(model=self.model, markdown=True)
+
+    async def aget_response(self, query, cache_ttl=None):
+        key = self.response_key(query)
+        # The response cache is SQLite: reads and writes stay off the event loop
+        if self._cacheable(cache_ttl):
+            cached = await asyncio.to_thread(self._cached, key, query, cache_ttl)
+            if cached is not None:
+                return cached
+
+        async def generate():
+            return (await self.run_agent().arun(query, stream=False)).content
+
+        content = await get_flight("llm").ado(key, generate)
+        if self._cacheable(cache_ttl) and content:
+            await asyncio.to_thread(get_response_cache().put, key, content, cache_ttl)
+        return content
+
+    async def astream_response(self, query, cache_ttl=None):
+        """Async stream_response: yields text without holding a thread for the whole generation"""
+        key = self.response_key(query) if self._cacheable(cache_ttl) else None
+        cached = await asyncio.to_thread(self._cached, key, query, cache_ttl) if key else None
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        async for chunk in await self.run_agent().arun(query, stream=True):
+            if isinstance(chunk.content, str) and chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+        if key and parts:
+            await asyncio.to_thread(get_response_cache().put, key, "".join(parts), cache_ttl)
 
     def print_response(self, query, stream=True):
 
@@ -0,0 +1,118 @@
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+
+from agents.resolver import normalize
+
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been before being best but by can could did do does
+for from get go had has have how i if in into is it its just like me more most my no not of on or our
+out should so some than that the their them then there these they this to too up us was we were what
+when where which while who why will with would you your
+""".split())
+
+
+def tokenize(text):
+    return [token for token in normalize(text).split() if token not in STOPWORDS and len(token) > 1]
+
+
+class BM25Index:
+    """In-memory inverted index over chunk text with Okapi BM25 scoring"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self.doc_len = {}
+        self.doc_text = {}
+        self.doc_destination = {}
+        self.destination_docs = Counter()
+        self.total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def destinations(self):
+        return set(self.doc_destination.values())
+
+    def _remove(self, doc_id):
+        for term in set(tokenize(self.doc_text[doc_id])):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_len -= self.doc_len.pop(doc_id)
+        del self.doc_text[doc_id]
+        self.destination_docs[self.doc_destination.pop(doc_id)] -= 1
+
+    def replace_destination(self, destination, ids, documents):
+        """Swap in the full set of chunks for one destination"""
+        with self._lock:
+            for doc_id in [d for d, dest in self.doc_destination.items() if dest == destination]:
+                self._remove(doc_id)
+            for doc_id, text in zip(ids, documents):
+                terms = Counter(tokenize(text))
+                for term, tf in terms.items():
+                    self.postings[term][doc_id] = tf
+                length = sum(terms.values())
+                self.doc_len[doc_id] = length
+                self.doc_text[doc_id] = text
+                self.doc_destination[doc_id] = destination
+                self.destination_docs[destination] += 1
+                self.total_len += length
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_len) - df + 0.5) / (df + 0.5))
+
+    def search(self, query, k=5, destinations=None, ignore_terms=(), max_df=1.0):
+        """Top-k (doc_id, score, normalized_score) for the query, optionally limited to destinations.
+
+        normalized_score divides by the score of an average-length chunk containing each query term
+        once, so it is comparable across queries (>= 1.0 roughly means every term matched). It only
+        counts distinctive terms: those not in ignore_terms that occur in at most max_df of the
+        searched chunks. It is 0.0 when the query has none, e.g. a bare "Austria" within that guide.
+        """
+        terms = tokenize(query)
+        if not terms or not self.doc_len:
+            return []
+        with self._lock:
+            avg_len = self.total_len / len(self.doc_len)
+            if destinations:
+                scope_docs = sum(self.destination_docs[dest] for dest in destinations)
+            else:
+                scope_docs = len(self.doc_len)
+            scores = defaultdict(float)
+            distinctive_scores = defaultdict(float)
+            ceiling = 0.0
+            for term in terms:
+                postings = self.postings.get(term)
+                idf = self.idf(term)
+                if not postings:
+                    if term not in ignore_terms:
+                        ceiling += idf
+                    continue
+                term_scores = {}
+                for doc_id, tf in postings.items():
+                    if destinations and self.doc_destination[doc_id] not in destinations:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avg_len)
+                    term_scores[doc_id] = idf * tf * (self.k1 + 1) / (tf + norm)
+                for doc_id, score in term_scores.items():
+                    scores[doc_id] += score
+                if term in ignore_terms or len(term_scores) > max_df * scope_docs:
+                    continue
+                ceiling += idf
+                for doc_id, score in term_scores.items():
+                    distinctive_scores[doc_id] += score
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [
+            (doc_id, score, distinctive_scores[doc_id] / ceiling if ceiling else 0.0)
+            for doc_id, score in top
+        ]
+
+    def document(self, doc_id):
+        return self.doc_text.get(doc_id)
@@ -0,0 +1,156 @@
+import os
+import re
+
+from langchain_core.documents import Document
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+# "regex" counts words and punctuation; "minilm" uses the tokenizer of the all-MiniLM-L6-v2 model
+# Chroma downloads; anything else is a path to a tokenizer.json. Part of the index settings, so it
+# is chosen explicitly rather than by whichever files happen to exist on this machine.
+CHUNK_TOKENIZER = os.getenv("CHUNK_TOKENIZER", "regex")
+MINILM_TOKENIZER = os.path.join(
+    os.path.expanduser("~"), ".cache", "chroma", "onnx_models", "all-MiniLM-L6-v2", "onnx", "tokenizer.json"
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_WORDS = re.compile(r"\w+|[^\w\s]")
+
+
+class TokenCounter:
+    """Counts tokens with a Hugging Face tokenizer.json, or approximates by words/punctuation"""
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = None
+        self.name = "regex-words"
+        tokenizer = tokenizer or CHUNK_TOKENIZER
+        if tokenizer == "regex":
+            return
+        path = MINILM_TOKENIZER if tokenizer == "minilm" else tokenizer
+        if not os.path.exists(path):
+            # Falling back silently would change the index settings and trigger a full reindex
+            raise FileNotFoundError(f"CHUNK_TOKENIZER={tokenizer!r}: no tokenizer file at {path}")
+        from tokenizers import Tokenizer
+        self.tokenizer = Tokenizer.from_file(path)
+        self.tokenizer.no_truncation()
+        self.tokenizer.no_padding()
+        self.name = os.path.basename(os.path.dirname(os.path.dirname(path))) or path
+
+    def __call__(self, text):
+        if self.tokenizer is None:
+            return len(_WORDS.findall(text))
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def split(self, text, max_tokens):
+        """Hard-split text into pieces of at most max_tokens, on word boundaries"""
+        pieces, current, current_tokens = [], [], 0
+        for word in text.split():
+            tokens = self(word)
+            if current and current_tokens + tokens > max_tokens:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(word)
+            current_tokens += tokens
+        if current:
+            pieces.append(" ".join(current))
+        return pieces
+
+
+def is_heading(line):
+    """Short, capitalised line without sentence punctuation, e.g. "FOOD & DRINK" or "The Alps" """
+    if not 3 <= len(line) <= 80 or line[-1] in ".,;!?" or line.isdigit():
+        return False
+    words = line.split()
+    if len(words) > 10 or not words[0][0].isalpha():
+        return False
+    if line.isupper():
+        return True
+    capitalised = sum(1 for w in words if w[0].isupper() or w.lower() in ("and", "of", "the", "in", "to", "&"))
+    return capitalised == len(words) and len(words) <= 6
+
+
+def blocks(text):
+    """Split page text into ("heading", text) and ("paragraph", text) blocks"""
+    result, lines = [], []
+
+    def flush():
+        if lines:
+            result.append(("paragraph", " ".join(lines)))
+            lines.clear()
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or re.fullmatch(r"\d{1,4}", line):  # blank lines and bare page numbers
+            flush()
+            continue
+        if is_heading(line):
+            flush()
+            result.append(("heading", line))
+            continue
+        if lines and lines[-1].endswith("-") and line[:1].islower():
+            lines[-1] = lines[-1][:-1] + line  # re-join hyphenated words
+        else:
+            lines.append(line)
+        if line[-1] in ".!?":
+            flush()
+    flush()
+    return result
+
+
+class StructuredChunker:
+    """Chunks guide pages along headings and paragraphs under a hard per-chunk token budget"""
+
+    def __init__(self, max_tokens=CHUNK_MAX_TOKENS, token_counter=None):
+        self.max_tokens = max_tokens
+        self.count_tokens = token_counter or TokenCounter()
+
+    def settings(self):
+        return {"chunker": "structured", "max_tokens": self.max_tokens, "tokenizer": self.count_tokens.name}
+
+    def last_heading(self, text, default=""):
+        """Section in effect at the end of a page, carried into the next one"""
+        headings = [value for kind, value in blocks(text) if kind == "heading"]
+        return headings[-1] if headings else default
+
+    def _units(self, paragraph):
+        if self.count_tokens(paragraph) <= self.max_tokens:
+            return [paragraph]
+        units = []
+        for sentence in _SENTENCE_END.split(paragraph):
+            if self.count_tokens(sentence) <= self.max_tokens:
+                units.append(sentence)
+            else:
+                units.extend(self.count_tokens.split(sentence, self.max_tokens))
+        return units
+
+    def split_documents(self, documents):
+        """Same interface as langchain splitters; adds section and token-count metadata"""
+        chunks = []
+        for doc in documents:
+            section = doc.metadata.get("section", "")
+            chunk_section, current, current_tokens, has_body = section, [], 0, False
+
+            def emit():
+                # A heading with no text after it on this page is not worth a chunk
+                if has_body:
+                    chunks.append(Document(
+                        page_content="\n".join(current),
+                        metadata=dict(doc.metadata, section=chunk_section, tokens=current_tokens)
+                    ))
+
+            for kind, value in blocks(doc.page_content):
+                if kind == "heading":
+                    emit()
+                    section = chunk_section = value
+                    # The heading leads its first chunk so the text keeps its context
+                    current, current_tokens, has_body = [value], self.count_tokens(value), False
+                    continue
+                for unit in self._units(value):
+                    tokens = self.count_tokens(unit)
+                    if current and current_tokens + tokens > self.max_tokens:
+                        emit()
+                        chunk_section, current, current_tokens, has_body = section, [], 0, False
+                    current.append(unit)
+                    current_tokens += tokens
+                    has_body = True
+            emit()
+        return chunks
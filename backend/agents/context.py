@@ -0,0 +1,96 @@
+import os
+
+from agents.bm25 import tokenize
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+# 1.0 ranks purely by relevance, lower values favour chunks that add new information
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+MIN_OVERLAP_CHARS = 20
+MIN_TAIL_TOKENS = 30
+
+
+def shingles(text, size=3):
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return {tuple(tokens)} if tokens else set()
+    return {tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def strip_overlap(other, text, min_chars=MIN_OVERLAP_CHARS):
+    """Remove text that repeats other across a chunk boundary (splitter overlap), either side"""
+    for size in range(min(len(other), len(text)), min_chars - 1, -1):
+        if other.endswith(text[:size]):
+            return text[size:].lstrip()
+        if other.startswith(text[-size:]):
+            return text[:-size].rstrip()
+    return text
+
+
+def _relevance(hit):
+    """Fused score, raw BM25 (lexical-shortcut hits) or vector similarity; mmr() min-max normalises it"""
+    if "score" in hit:
+        return hit["score"]
+    if "bm25" in hit:
+        return hit["bm25"]
+    return 1.0 - hit.get("distance", 0.0)
+
+
+def mmr(hits, lambda_=MMR_LAMBDA):
+    """Order hits by maximal marginal relevance, using word-shingle overlap as redundancy"""
+    if not hits:
+        return []
+    relevances = [_relevance(hit) for hit in hits]
+    low, high = min(relevances), max(relevances)
+    relevances = [(r - low) / (high - low) if high > low else 1.0 for r in relevances]
+    sets = [shingles(hit["document"]) for hit in hits]
+
+    remaining = list(range(len(hits)))
+    selected = []
+    while remaining:
+        best = max(
+            remaining,
+            key=lambda i: lambda_ * relevances[i]
+            - (1 - lambda_) * max((jaccard(sets[i], sets[j]) for j in selected), default=0.0)
+        )
+        selected.append(best)
+        remaining.remove(best)
+    return [hits[i] for i in selected]
+
+
+def compress_context(hits, count_tokens, token_budget=CONTEXT_TOKEN_BUDGET, lambda_=MMR_LAMBDA):
+    """Drop near-duplicates and overlap, diversify with MMR and trim to a token budget.
+
+    hits are retrieval results in rank order; returns the passages to put in the prompt.
+    """
+    unique, unique_sets = [], []
+    for hit in hits:
+        hit_set = shingles(hit["document"])
+        if any(jaccard(hit_set, seen) >= NEAR_DUPLICATE_THRESHOLD for seen in unique_sets):
+            continue
+        unique.append(hit)
+        unique_sets.append(hit_set)
+
+    passages, used = [], 0
+    for hit in mmr(unique, lambda_):
+        text = hit["document"]
+        for previous in passages:
+            text = strip_overlap(previous, text)
+        text = text.strip()
+        if not text:
+            continue
+        tokens = count_tokens(text)
+        if used + tokens > token_budget:
+            remaining = token_budget - used
+            if remaining >= MIN_TAIL_TOKENS:
+                passages.append(count_tokens.split(text, remaining)[0])
+            break
+        passages.append(text)
+        used += tokens
+    return passages
@@ -1,137 +1,415 @@
 from agents.base_agent import BaseAgent
+import asyncio
 import os
-from langchain_community.document_loaders import PyPDFLoader
+import time
 from langchain_community.embeddings import OllamaEmbeddings  # Updated import
-from chromadb import PersistentClient
-from chromadb.utils import embedding_functions  # For direct embedding function
-from langchain.text_splitter import CharacterTextSplitter
+from agents.bm25 import BM25Index
+from agents.cache import TTLCache
+from agents.chunker import StructuredChunker
+from agents.context import CONTEXT_TOKEN_BUDGET, compress_context
+from agents.embedding_cache import CachedEmbeddingFunction
+from agents.embeddings import get_embedding_provider
+from agents.ingestion import sync_destination
+from agents.manifest import IngestManifest, settings_fingerprint
+from agents.query_rewriter import QueryRewriter
+from agents.resolver import DestinationResolver, normalize
+from agents.semantic_cache import SemanticCache, semantic_cache_enabled
+from agents.timing import StageTimer
+from agents.retrieval import (
+    CANDIDATE_MULTIPLIER, HYBRID_WEIGHT, LEXICAL_SHORTCUT, LEXICAL_SHORTCUT_MAX_DF,
+    balance, dense_hits, fuse, lexical_hits
+)
+from agents.vector_search import VECTOR_BACKEND, NumpyVectorIndex
+from agents.vector_store import ShardRouter, get_client, store_path
 import re
 
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))
+# How often a loaded destination's guide PDF is checked for changes while the server runs
+GUIDE_RECHECK_SECONDS = float(os.getenv("GUIDE_RECHECK_SECONDS", "60"))
+# "chained" (PDF answer, then insights) or "single" (passages go straight into one generation)
+RAG_MODE = os.getenv("RAG_MODE", "chained")
+RAG_REWRITE_QUERY = os.getenv("RAG_REWRITE_QUERY", "1") == "1"
+# Candidates fetched per final passage before compression picks the most informative ones
+CONTEXT_CANDIDATE_FACTOR = int(os.getenv("CONTEXT_CANDIDATE_FACTOR", "2"))
+# Response-cache lifetimes for answers that are a pure function of their prompt
+GREETING_CACHE_TTL = float(os.getenv("GREETING_CACHE_TTL", str(24 * 3600)))
+INSIGHTS_CACHE_TTL = float(os.getenv("INSIGHTS_CACHE_TTL", str(6 * 3600)))
+
 class DestinationAgent(BaseAgent):
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, db_path=None, embedding_provider=None):
         super().__init__(
             name="DestinationExpert",
             description="Provides factual insights on travel destinations with conversation history support",
             avatar="travel_avatar.png"
         )
         self.pdf_path = pdf_path
-        
-        # Use native Chroma embedding function
-        self.embedding_function = embedding_functions.OllamaEmbeddingFunction(
-            url="http://localhost:11434/api/embeddings",
-            model_name="nomic-embed-text"
+        # Heading/paragraph-aware chunks with a hard token budget (CHUNK_MAX_TOKENS)
+        self.chunker = StructuredChunker()
+        # Built once and refreshed when the data directory changes; no listdir per request
+        self.resolver = DestinationResolver(pdf_path)
+        self.query_rewriter = QueryRewriter(
+            resolver=self.resolver,
+            llm_rewrite=self.llm_standalone_query,
+            allm_rewrite=self.allm_standalone_query
         )
         
-        self.loaded_destinations = set()
-        self.client = PersistentClient(path="chroma_db")  # Simplified initialization
+        # Ollama over HTTP by default; EMBEDDING_PROVIDER=onnx embeds in-process
+        self.embedding_provider = embedding_provider or get_embedding_provider()
+        self.embedding_function = self.embedding_provider.chroma_embedding_function
+        # All embedding calls (ingest and query) go through the on-disk cache
+        self.embedder = CachedEmbeddingFunction(self.embedding_provider, self.embedding_provider.model_name)
         
-        self.collection = self.client.get_or_create_collection(
-            name="destination_docs",
-            embedding_function=self.embedding_function
-        ) 
+        # Vectors from different providers have different dimensions, so each gets its own collection
+        collection_name = "destination_docs"
+        if self.embedding_provider.name != "ollama":
+            collection_name = f"destination_docs_{self.embedding_provider.name}"
+
+        # dest_key -> (manifest version it was loaded at, monotonic time of the last PDF check)
+        self.loaded_destinations = {}
+        self.retrieval_cache = TTLCache(maxsize=RETRIEVAL_CACHE_SIZE, ttl=RETRIEVAL_CACHE_TTL)
+        # Answers to earlier questions, reused for close paraphrases of them
+        self.semantic_cache = SemanticCache()
+        # Lexical index over the same chunks, filled as destinations are loaded
+        self.lexical_index = BM25Index()
+        # One canonical store (CHROMA_DB_PATH, default backend/chroma_db) and one client per process
+        self.db_path = store_path(db_path)
+        self.client = get_client(self.db_path)
+        # One shared collection filtered by destination, or one shard per destination (VECTOR_SHARDING=1)
+        self.router = ShardRouter(self.client, collection_name, self.embedding_function)
+        # Shared with every process/worker pointing at the same store
+        self.manifest = IngestManifest(self.db_path, self.router.name)
+        # Optional exact-search backend over a memory-mapped copy of the collection's vectors
+        self.vector_backend = VECTOR_BACKEND
+        self.vector_index = NumpyVectorIndex(os.path.join(self.db_path, f"{self.router.name}_vectors"))
 
-    def ensure_destination_loaded(self, destination):
-        if destination.lower() in self.loaded_destinations:
+    def index_settings(self):
+        """Settings that change chunk contents or vectors; any change forces a reindex"""
+        return dict(self.chunker.settings(), embedding_model=self.embedding_provider.model_name)
+
+    def ensure_destination_loaded(self, destination, force=False, refresh=False):
+        """Index a destination's PDF if needed.
+
+        A loaded destination's PDF is re-checked every GUIDE_RECHECK_SECONDS (refresh checks it
+        now); changed pages are re-embedded incrementally. force rebuilds it from scratch.
+        """
+        dest_key = self.resolver.resolve(destination)
+        if not dest_key:
+            return False
+        loaded = self.loaded_destinations.get(dest_key)
+        if loaded and not (force or refresh) and time.monotonic() - loaded[1] < GUIDE_RECHECK_SECONDS:
+            if self.manifest.version(dest_key) != loaded[0]:
+                # Another worker re-ingested: Chroma has the new chunks, only our BM25 copy is stale
+                self._mark_loaded(dest_key)
             return True
-            
-        pdf_file = self.get_matching_pdf(destination)
+
+        pdf_file = self.resolver.pdf_for(dest_key)
         if not pdf_file:
             return False
-            
-        # Load and process PDF
-        loader = PyPDFLoader(pdf_file)
-        text_splitter = CharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50
-        )
-        docs = loader.load_and_split(text_splitter)
-        
-        # Add documents directly to Chroma
-        for i, doc in enumerate(docs):
-            self.collection.add(
-                ids=f"doc_{i}_{destination}",
-                documents=doc.page_content,
-                metadatas={"destination": destination.lower()}
-            )
+
+        fingerprint = settings_fingerprint(self.index_settings())
+        if not force and self.manifest.is_current(dest_key, pdf_file, fingerprint):
+            self._mark_loaded(dest_key, reload_lexical=refresh)
+            return True
+
+        with self.manifest.building(dest_key):
+            # Another worker may have finished indexing while we waited for the lock
+            if force or not self.manifest.is_current(dest_key, pdf_file, fingerprint):
+                # Only pages whose text changed since the last build are re-chunked and re-embedded
+                summary = sync_destination(
+                    self.router.collection_for(dest_key),
+                    self.embedder,
+                    self.manifest,
+                    dest_key,
+                    pdf_file,
+                    self.chunker,
+                    fingerprint,
+                    force=force
+                )
+                if summary["added_chunks"] or summary["removed_chunks"]:
+                    self.retrieval_cache.invalidate(lambda key: not key[0] or dest_key in key[0])
+                    if self.vector_backend == "numpy":
+                        self.vector_index.build(*self.router.collections())
         
-        self.loaded_destinations.add(destination.lower())
+        self._mark_loaded(dest_key, reload_lexical=True)
         return True
 
+    def _mark_loaded(self, dest_key, reload_lexical=False):
+        version = self.manifest.version(dest_key)
+        loaded = self.loaded_destinations.get(dest_key)
+        if loaded is None or loaded[0] != version:
+            reload_lexical = True
+        # The BM25 index is rebuilt from rows already stored in Chroma, so no re-embedding is needed
+        if reload_lexical or dest_key not in self.lexical_index.destinations():
+            rows = self.router.collection_for(dest_key).get(where={"destination": dest_key}, include=["documents"])
+            self.lexical_index.replace_destination(dest_key, rows["ids"], rows["documents"])
+        # Stores built before the numpy backend was enabled have no matrix yet
+        if self.vector_backend == "numpy" and not self.vector_index.has({dest_key}):
+            self.vector_index.build(*self.router.collections())
+        self.loaded_destinations[dest_key] = (version, time.monotonic())
+
+    def available_destinations(self):
+        """Destinations that have a guide PDF in the data directory"""
+        return self.resolver.destinations()
+
     def get_matching_pdf(self, destination):
-        """Find PDF matching destination (case-insensitive)"""
-        dest_lower = destination.strip().lower()
-        for fname in os.listdir(self.pdf_path):
-            if fname.lower().endswith('.pdf'):
-                base_name = os.path.splitext(fname)[0].lower()
-                if base_name == dest_lower:
-                    return os.path.join(self.pdf_path, fname)
-        return None
+        """Find the PDF for a destination name, alias, demonym or city"""
+        canonical = self.resolver.resolve(destination)
+        return self.resolver.pdf_for(canonical) if canonical else None
 
     def is_followup(self, query, history):
         """Detect follow-up questions using linguistic cues"""
-        if not history:
-            return False
-        return any(word in query.lower() for word in 
-                 ['they', 'it', 'there', 'that', 'those', 'more', 'how about'])
+        return self.query_rewriter.is_followup(query, history)
 
     def make_standalone_query(self, current_query, history):
-        """Rewrite follow-up questions to standalone format"""
-        if not history or not self.is_followup(current_query, history):
-            return current_query
-        
+        """Rewrite follow-up questions to standalone format (locally, LLM only when unsure)"""
+        return self.query_rewriter.resolve(current_query, history)
+
+    def llm_standalone_query(self, current_query, history):
+        """LLM rewrite used when local pronoun resolution is not confident"""
+        return self.get_response(self.standalone_query_prompt(current_query, history)).strip()
+
+    async def allm_standalone_query(self, current_query, history):
+        return (await self.aget_response(self.standalone_query_prompt(current_query, history))).strip()
+
+    def standalone_query_prompt(self, current_query, history):
         # Format history for prompt
         history_str = "\n".join([f"User: {h['user']}\nBot: {h['bot']}" for h in history[-3:]])
         
-        prompt = f"""
+        return f"""
         Rewrite this follow-up question to be standalone using context:
         Chat History:
         {history_str}
         Follow-up: {current_query}
         Standalone question:"""
-        return self.get_response(prompt, max_tokens=100).strip()
 
     def get_relevant_documents(self, query, history=None, destination=None):
         """Enhanced retrieval with follow-up handling and destination filter"""
-        filter = {"destination": destination.lower()} if destination else None
         n_results = 5 if (history and self.is_followup(query, history)) else 3
+        return [hit["document"] for hit in self.retrieve(query, destination, n_results)]
+
+    def get_context_passages(self, query, history=None, destination=None):
+        """Retrieve extra candidates, then dedupe, diversify (MMR) and trim them to the context token budget"""
+        n_results = 5 if (history and self.is_followup(query, history)) else 3
+        hits = self.retrieve(query, destination, n_results * CONTEXT_CANDIDATE_FACTOR)
+        return self._compress_hits(hits, destination)
+
+    async def aget_context_passages(self, query, history=None, destination=None):
+        n_results = 5 if (history and self.is_followup(query, history)) else 3
+        hits = await self.aretrieve(query, destination, n_results * CONTEXT_CANDIDATE_FACTOR)
+        return self._compress_hits(hits, destination)
+
+    def _compress_hits(self, hits, destination):
+        destinations = self.resolve_destinations(destination)
+        if len(destinations) <= 1:
+            return compress_context(hits, self.chunker.count_tokens)
+
+        # Compress each destination separately so every one keeps an equal share of the budget
+        passages = []
+        budget = CONTEXT_TOKEN_BUDGET // len(destinations)
+        for dest in destinations:
+            dest_hits = [hit for hit in hits if hit["destination"] == dest]
+            dest_passages = compress_context(dest_hits, self.chunker.count_tokens, budget)
+            if dest_passages:
+                passages.append(f"[{dest.title()}]")
+                passages.extend(dest_passages)
+        return passages
+
+    def resolve_destinations(self, destination):
+        """Canonical destinations for a name, free text naming several places, or a list of names"""
+        if not destination:
+            return []
+        names = [destination] if isinstance(destination, str) else destination
+        found = []
+        for name in names:
+            for dest in self.resolver.resolve_all(name) or [name.strip().lower()]:
+                if dest not in found:
+                    found.append(dest)
+        return found
+
+    def retrieve(self, query, destination=None, n_results=3):
+        """Hybrid BM25 + vector retrieval; returns hit dicts with id, document, destination and score.
+
+        destination may be a single name, free text naming several places or a list; with several
+        destinations each one gets up to n_results hits, interleaved by rank.
+        """
+        destinations, key = self._retrieval_key(query, destination, n_results)
+        hits = self.retrieval_cache.get(key)
+        if hits is None:
+            hits = self._retrieve(query, destinations, n_results)
+            self.retrieval_cache.set(key, hits)
+        return list(hits)
+
+    async def aretrieve(self, query, destination=None, n_results=3):
+        """retrieve() that awaits the query embedding and runs the vector search in a worker thread"""
+        destinations, key = self._retrieval_key(query, destination, n_results)
+        hits = self.retrieval_cache.get(key)
+        if hits is None:
+            hits = await self._aretrieve(query, destinations, n_results)
+            self.retrieval_cache.set(key, hits)
+        return list(hits)
+
+    def _retrieval_key(self, query, destination, n_results):
+        destinations = tuple(self.resolve_destinations(destination))
+        # The manifest version changes whenever any worker re-ingests, so stale entries are never served
+        versions = tuple(self.manifest.version(dest) for dest in destinations) or self.manifest.version()
+        return destinations, (destinations, normalize(query), n_results, versions)
+
+    def _where(self, destinations):
+        if not destinations:
+            return None
+        if len(destinations) == 1:
+            return {"destination": destinations[0]}
+        return {"destination": {"$in": list(destinations)}}
+
+    def _retrieve(self, query, destinations, n_results):
+        lexical, shortcut = self._lexical_candidates(query, destinations, n_results)
+        if shortcut:
+            return lexical[:n_results]
+        return self._dense_and_fuse(self.embedder([query]), lexical, destinations, n_results)
+
+    async def _aretrieve(self, query, destinations, n_results):
+        lexical, shortcut = self._lexical_candidates(query, destinations, n_results)
+        if shortcut:
+            return lexical[:n_results]
+        query_embeddings = await self.embedder.aembed([query])
+        return await asyncio.to_thread(self._dense_and_fuse, query_embeddings, lexical, destinations, n_results)
 
-        # Query ChromaDB collection directly
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results,
-            where=filter
+    def _lexical_candidates(self, query, destinations, n_results):
+        """(BM25 hits, shortcut): shortcut means they are strong enough to skip the embedding"""
+        total_k = n_results * CANDIDATE_MULTIPLIER * max(len(destinations), 1)
+        matches = self.lexical_index.search(
+            query, k=total_k, destinations=set(destinations) or None,
+            # "Austria" (or "Austrian") is in most of the Austria guide, so it cannot single out chunks
+            ignore_terms=self.resolver.name_terms(destinations), max_df=LEXICAL_SHORTCUT_MAX_DF
         )
-        # Chroma returns a dict with 'documents' as a list of lists
-        docs = results['documents'][0] if results['documents'] else []
-        # If you want to mimic doc.page_content, just return the strings
-        return docs
+        lexical = lexical_hits(self.lexical_index, matches)
+        # Strong exact-term matches of distinctive words (e.g. "Hallstatt") skip the embedding round-trip
+        shortcut = (
+            len(destinations) <= 1 and len(matches) >= n_results
+            and HYBRID_WEIGHT < 1 and matches[0][2] >= LEXICAL_SHORTCUT
+        )
+        return lexical, shortcut
+
+    def _dense_and_fuse(self, query_embeddings, lexical, destinations, n_results):
+        allowed = set(destinations) or None
+        fetch_k = n_results * CANDIDATE_MULTIPLIER
+        if self.vector_backend == "numpy" and self.vector_index.has(allowed):
+            # Exact search is cheap per destination range, so each one gets its full quota directly
+            dense = []
+            for dest in destinations or (None,):
+                dense.extend(self.vector_index.search(query_embeddings[0], fetch_k, {dest} if dest else None))
+        else:
+            # One query for all destinations (one per shard when sharded) instead of one per destination
+            dense = self._dense_query(query_embeddings, fetch_k, destinations)
+            counts = {dest: 0 for dest in destinations}
+            for hit in dense:
+                if hit["destination"] in counts:
+                    counts[hit["destination"]] += 1
+            # A destination crowded out of the shared top-k gets one follow-up query of its own
+            starved = tuple(dest for dest, count in counts.items() if count < n_results)
+            if len(destinations) > 1 and starved and not self.router.sharded:
+                seen = {hit["id"] for hit in dense}
+                extra = self._dense_query(query_embeddings, fetch_k, starved)
+                dense.extend(hit for hit in extra if hit["id"] not in seen)
+        fused = fuse(dense, lexical, len(dense) + len(lexical))
+        return balance(fused, destinations, n_results)
+
+    def _dense_query(self, query_embeddings, per_destination, destinations):
+        """Nearest chunks for destinations, per_destination candidates each, from their collections"""
+        dense = []
+        for collection, group in self.router.route(destinations):
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=per_destination * max(len(group), 1),
+                # A shard holds a single destination, so it needs no metadata filter
+                where=None if self.router.sharded else self._where(group),
+                include=["documents", "metadatas", "distances"]
+            )
+            dense.extend(dense_hits(results))
+        if self.router.sharded:
+            dense.sort(key=lambda hit: hit["distance"])
+        return dense
 
-    def query_pdf(self, destination, history=None, query=None):
+    def query_pdf(self, destination, history=None, query=None, timer=None):
         """Modified PDF query with contextual awareness"""
-        # Ensure destination is loaded
-        if not self.ensure_destination_loaded(destination):
+        timer = timer or StageTimer()
+        pdf_context, effective_query = self.retrieve_pdf_context(destination, history, query, timer)
+        if pdf_context is None:
             return ""
         
-        # Use rewritten query if available
-        effective_query = self.make_standalone_query(query or destination, history)
-        
-        # Retrieve context with history awareness
-        docs = self.get_relevant_documents(
-            effective_query, 
-            history,
-            destination=destination
+        # Build context-aware prompt
+        prompt = self.build_contextual_prompt(
+            destination=destination,
+            context=pdf_context,
+            history=history,
+            query=effective_query
         )
-        pdf_context = "\n".join(docs)
         
-        # Build context-aware prompt
+        with timer.stage("pdf_answer"):
+            return self.get_response(prompt)
+
+    async def aquery_pdf(self, destination, history=None, query=None, timer=None):
+        timer = timer or StageTimer()
+        pdf_context, effective_query = await self.aretrieve_pdf_context(destination, history, query, timer)
+        if pdf_context is None:
+            return ""
         prompt = self.build_contextual_prompt(
             destination=destination,
             context=pdf_context,
             history=history,
             query=effective_query
         )
+        with timer.stage("pdf_answer"):
+            return await self.aget_response(prompt)
+
+    def retrieve_pdf_context(self, destination, history=None, query=None, timer=None, rewrite=True):
+        """Load the destination, rewrite the query and return (joined passages, effective query).
+
+        Returns (None, query) when no guide PDF matches the destination.
+        """
+        timer = timer or StageTimer()
+        # Ensure destination is loaded
+        with timer.stage("ingest"):
+            destinations = self._load_destinations(destination)
+            if not destinations:
+                return None, query
         
-        return self.get_response(prompt)
+        # Use rewritten query if available
+        with timer.stage("rewrite"):
+            if rewrite:
+                effective_query = self.make_standalone_query(query or destination, history)
+            else:
+                effective_query = query or destination
+        
+        # Retrieve context with history awareness
+        with timer.stage("retrieve"):
+            docs = self.get_context_passages(
+                effective_query, 
+                history,
+                destination=destinations
+            )
+        return "\n".join(docs), effective_query
+
+    async def aretrieve_pdf_context(self, destination, history=None, query=None, timer=None, rewrite=True):
+        """Async retrieve_pdf_context; indexing (rare, CPU and disk bound) runs in a worker thread"""
+        timer = timer or StageTimer()
+        with timer.stage("ingest"):
+            destinations = await asyncio.to_thread(self._load_destinations, destination)
+            if not destinations:
+                return None, query
+        with timer.stage("rewrite"):
+            if rewrite:
+                effective_query = await self.query_rewriter.aresolve(query or destination, history)
+            else:
+                effective_query = query or destination
+        with timer.stage("retrieve"):
+            docs = await self.aget_context_passages(effective_query, history, destination=destinations)
+        return "\n".join(docs), effective_query
+
+    def _load_destinations(self, destination):
+        # "compare Austria and Switzerland" loads and searches both guides
+        return [dest for dest in self.resolve_destinations(destination) if self.ensure_destination_loaded(dest)]
 
     def build_contextual_prompt(self, destination, context, history, query):
         """Create conversation-aware prompt template"""
@@ -176,25 +454,107 @@ class DestinationAgent(BaseAgent):
         return message.strip()
 
     def greet(self, interest_type=None):
+        return self.get_response(self.greeting_prompt(interest_type), cache_ttl=GREETING_CACHE_TTL)
+
+    def semantic_lookup(self, endpoint, destination, history=None, query=None, usePdf=False, rag_mode=None):
+        """(cache handle, answer to a close paraphrase or None) from the semantic answer cache.
+
+        The handle is None when the question must not be answered from the cache; pass it
+        to semantic_store() with the generated answer otherwise.
+        """
+        scope = self._semantic_scope(endpoint, destination, history, query, usePdf, rag_mode)
+        if scope is None:
+            return None, None
+        vector = self.embedder([f"{scope[0]}: {query}"])[0]
+        hit = self.semantic_cache.lookup(scope, vector)
+        return (scope, vector), hit[0] if hit else None
+
+    async def asemantic_lookup(self, endpoint, destination, history=None, query=None, usePdf=False, rag_mode=None):
+        scope = self._semantic_scope(endpoint, destination, history, query, usePdf, rag_mode)
+        if scope is None:
+            return None, None
+        vector = (await self.embedder.aembed([f"{scope[0]}: {query}"]))[0]
+        hit = self.semantic_cache.lookup(scope, vector)
+        return (scope, vector), hit[0] if hit else None
+
+    def semantic_store(self, handle, answer):
+        if handle is not None and answer:
+            self.semantic_cache.store(handle[0], handle[1], answer)
+
+    def _semantic_scope(self, endpoint, destination, history, query, usePdf, rag_mode):
+        # Follow-ups depend on the conversation, not only on the question
+        if not semantic_cache_enabled(endpoint) or not query or self.is_followup(query, history):
+            return None
+        # The resolved guide plus the name it matched by ("Vienna" and "Salzburg" share a guide but
+        # not an answer); the wording is left to the embedding. Unknown places are not cached.
+        match = self.resolver.resolve_name(destination)
+        if match is None:
+            return None
+        dest_key, place = match
+        if not usePdf:
+            return (dest_key, place, False)
+        # A re-ingested guide changes the manifest version, so answers from the old text are not reused
+        return (dest_key, place, True, rag_mode or RAG_MODE, self.manifest.version(dest_key))
+
+    def response_cache_ttl(self, interest_type=None, usePdf=False):
+        """Cache lifetime for a final answer: greetings and PDF-free insights depend only on their prompt"""
+        if interest_type:
+            return GREETING_CACHE_TTL
+        return None if usePdf else INSIGHTS_CACHE_TTL
+
+    def greeting_prompt(self, interest_type=None):
         if interest_type == "culture":
-            return self.get_response(
-                "Generate a suggestion of european countries for travelers interested in exploring culture/history/arts."
-            )
+            return "Generate a suggestion of european countries for travelers interested in exploring culture/history/arts."
         elif interest_type == "food":
-            return self.get_response(
-                "Generate a suggestion of european countries for travelers interested in exploring food/culinary/eating."
-            )
+            return "Generate a suggestion of european countries for travelers interested in exploring food/culinary/eating."
         else:
-            return self.get_response(
-                "Generate a suggestion of european countries for travelers interested in exploring nature/hiking."
-            )
+            return "Generate a suggestion of european countries for travelers interested in exploring nature/hiking."
+
+    def get_destination_insights(self, destination, history=None, query=None, usePdf=False, rag_mode=None, timer=None):
+        """Main method with follow-up support.
 
-    def get_destination_insights(self, destination, history=None, query=None, usePdf=False):
-        """Main method with follow-up support"""
-        if (usePdf):
-            pdf_context = self.query_pdf(destination, history, query)
+        rag_mode "chained" answers from the PDF first and feeds that answer into the final prompt;
+        "single" feeds the retrieved passages straight into one final generation.
+        Pass a StageTimer to collect per-stage timings.
+        """
+        timer = timer or StageTimer()
+        prompt = self.insights_prompt(destination, history, query, usePdf, rag_mode, timer)
+        with timer.stage("generate"):
+            return self.get_response(prompt, cache_ttl=self.response_cache_ttl(usePdf=usePdf))
+
+    def insights_prompt(self, destination, history=None, query=None, usePdf=False, rag_mode=None, timer=None):
+        """Retrieve (and in chained mode pre-answer) the guide context and build the final prompt"""
+        rag_mode = rag_mode or RAG_MODE
+        timer = timer or StageTimer()
+        focus = None
+        if not usePdf:
+            pdf_context = ""
+        elif rag_mode == "single":
+            pdf_context, focus = self.retrieve_pdf_context(
+                destination, history, query, timer, rewrite=RAG_REWRITE_QUERY
+            )
         else:
+            pdf_context = self.query_pdf(destination, history, query, timer)
+        return self.format_insights_prompt(destination, history, pdf_context, focus)
+
+    async def ainsights_prompt(self, destination, history=None, query=None, usePdf=False, rag_mode=None, timer=None):
+        """insights_prompt() with async retrieval and LLM calls"""
+        rag_mode = rag_mode or RAG_MODE
+        timer = timer or StageTimer()
+        focus = None
+        if not usePdf:
             pdf_context = ""
+        elif rag_mode == "single":
+            pdf_context, focus = await self.aretrieve_pdf_context(
+                destination, history, query, timer, rewrite=RAG_REWRITE_QUERY
+            )
+        else:
+            pdf_context = await self.aquery_pdf(destination, history, query, timer)
+        return self.format_insights_prompt(destination, history, pdf_context, focus)
+
+    def format_insights_prompt(self, destination, history, pdf_context, focus=None):
+        # In single-pass mode the question itself has to reach the final prompt
+        focus_section = f"**Current Question:**\n        {focus}\n\n        " if focus else ""
         
         prompt = f"""
         **Local Guide Context:**
@@ -203,7 +563,7 @@ class DestinationAgent(BaseAgent):
         **Conversation History:**
         {history[-2:] if history else 'No recent history'}
 
-        **Your Task:**
+        {focus_section}**Your Task:**
         Provide insights about {destination} including:
         - Cultural/historical context
         - Interesting historical fact/story
@@ -217,4 +577,4 @@ class DestinationAgent(BaseAgent):
         - Emojis for key points
         - Italics for local context details
         """
-        return self.get_response(prompt)
+        return prompt
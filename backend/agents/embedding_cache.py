@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(".cache", "embeddings.sqlite3"))
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "256"))
+# Hits only refresh an entry's LRU position when it was last touched longer ago than this
+EMBEDDING_CACHE_TOUCH_SECONDS = float(os.getenv("EMBEDDING_CACHE_TOUCH_SECONDS", "600"))
+
+
+def text_key(model_name, text):
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent (model, text hash) -> float32 vector store with LRU eviction by total size"""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_bytes=int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024),
+                 touch_seconds=EMBEDDING_CACHE_TOUCH_SECONDS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.touch_seconds = touch_seconds
+        self.hits = 0
+        self.misses = 0
+        # key -> last use not yet written; flushed on the next write, before anything is evicted
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, nbytes INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """Return {key: vector} for the keys that are cached; a read-only lookup that never writes.
+
+        LRU positions older than touch_seconds are refreshed in memory and written with the next put.
+        """
+        if not keys:
+            return {}
+        found = {}
+        now = time.time()
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                for key, blob, last_used in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                    if now - last_used > self.touch_seconds:
+                        self._touched[key] = now
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items):
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, blob, len(blob), now))
+        with self._lock:
+            self._flush_touched()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, nbytes, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?", [(t, key) for key, t in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% of the budget so we don't evict on every insert once full
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        doomed = []
+        for key, nbytes in self._conn.execute("SELECT key, nbytes FROM embeddings ORDER BY last_used"):
+            doomed.append((key,))
+            freed += nbytes
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+class CachedEmbeddingFunction:
+    """Wraps a Chroma embedding function so repeated texts are never sent to the embedder twice"""
+
+    def __init__(self, embedding_function, model_name, cache=None):
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache()
+
+    def _lookup(self, input):
+        keys = [text_key(self.model_name, text) for text in input]
+        cached = self.cache.get_many(keys)
+        missing = {}
+        for key, text in zip(keys, input):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        return keys, cached, missing
+
+    def _store(self, cached, missing, vectors):
+        fresh = list(zip(missing.keys(), vectors))
+        self.cache.put_many(fresh)
+        cached.update((key, np.asarray(vector, dtype=np.float32)) for key, vector in fresh)
+
+    def __call__(self, input):
+        keys, cached, missing = self._lookup(input)
+        if missing:
+            self._store(cached, missing, self.embedding_function(list(missing.values())))
+        return [cached[key] for key in keys]
+
+    async def aembed(self, input):
+        """Async __call__: awaits the provider's aembed, or runs a local (CPU) provider in a thread"""
+        # SQLite reads and the cache lock stay off the event loop
+        keys, cached, missing = await asyncio.to_thread(self._lookup, input)
+        if missing:
+            texts = list(missing.values())
+            if hasattr(self.embedding_function, "aembed"):
+                vectors = await self.embedding_function.aembed(texts)
+            else:
+                vectors = await asyncio.to_thread(self.embedding_function, texts)
+            await asyncio.to_thread(self._store, cached, missing, vectors)
+        return [cached[key] for key in keys]
@@ -0,0 +1,110 @@
+import os
+from urllib.parse import urlsplit
+
+import numpy as np
+from chromadb.utils import embedding_functions
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "ollama")
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/embeddings")
+OLLAMA_EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR")
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0"))  # 0 lets onnxruntime pick
+ONNX_BATCH_SIZE = int(os.getenv("ONNX_BATCH_SIZE", "32"))
+
+
+class OllamaEmbeddingProvider:
+    """Embeddings from the Ollama sidecar over HTTP"""
+    name = "ollama"
+
+    def __init__(self, model_name=OLLAMA_EMBEDDING_MODEL, url=OLLAMA_URL):
+        self.model_name = model_name
+        self.chroma_embedding_function = embedding_functions.OllamaEmbeddingFunction(
+            url=url,
+            model_name=model_name
+        )
+        parts = urlsplit(url)
+        self.host = f"{parts.scheme}://{parts.netloc}"
+        self._async_client = None
+
+    def __call__(self, input):
+        return self.chroma_embedding_function(input)
+
+    async def aembed(self, input):
+        """Same embeddings as __call__ (Ollama's embed API) without blocking the event loop"""
+        if self._async_client is None:
+            from ollama import AsyncClient
+            self._async_client = AsyncClient(host=self.host)
+        response = await self._async_client.embed(model=self.model_name, input=list(input))
+        return [np.asarray(vector, dtype=np.float32) for vector in response["embeddings"]]
+
+
+class OnnxEmbeddingProvider:
+    """In-process all-MiniLM-L6-v2 on onnxruntime's CPU provider, with batched inference"""
+    name = "onnx"
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, num_threads=ONNX_NUM_THREADS, batch_size=ONNX_BATCH_SIZE, max_length=256):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        # Same model and pooling as Chroma's ONNXMiniLM_L6_V2, so Chroma can still embed for this collection
+        self.chroma_embedding_function = embedding_functions.ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+        self.model_name = f"onnx-{self.chroma_embedding_function.MODEL_NAME}"
+        if model_dir is None:
+            # Reuse the model archive Chroma downloads into ~/.cache/chroma
+            self.chroma_embedding_function._download_model_if_not_exists()
+            model_dir = os.path.join(
+                self.chroma_embedding_function.DOWNLOAD_PATH,
+                self.chroma_embedding_function.EXTRACTED_FOLDER_NAME
+            )
+
+        self.batch_size = max(1, batch_size)
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        # Pad each batch to its longest text only, not to max_length
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.log_severity_level = 3
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed_batch(self, texts):
+        encoded = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        last_hidden_state = self.session.run(None, feeds)[0]
+        # Mean pooling over real tokens, then L2 normalise
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def __call__(self, input):
+        embeddings = []
+        for start in range(0, len(input), self.batch_size):
+            embeddings.extend(self._embed_batch(list(input[start:start + self.batch_size])))
+        return embeddings
+
+
+PROVIDERS = {
+    OllamaEmbeddingProvider.name: OllamaEmbeddingProvider,
+    OnnxEmbeddingProvider.name: OnnxEmbeddingProvider,
+}
+
+
+def get_embedding_provider(name=None, **kwargs):
+    """Build the embedding provider selected by name or the EMBEDDING_PROVIDER env var"""
+    name = (name or EMBEDDING_PROVIDER).lower()
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown embedding provider '{name}', expected one of {sorted(PROVIDERS)}")
+    return PROVIDERS[name](**kwargs)
@@ -1,7 +1,13 @@
+import asyncio
+import time
+
+import httpx
 import praw
-import spacy
 from textblob import TextBlob
 from agents.base_agent import BaseAgent
+from agents.nlp import get_nlp
+from agents.resolver import normalize
+from agents.singleflight import get_flight
 from dotenv import load_dotenv
 import os
 
@@ -11,8 +17,9 @@ client_id = os.getenv('REDDIT_CLIENT_ID')
 client_secret = os.getenv('REDDIT_CLIENT_SECRET')
 user_agent = os.getenv('REDDIT_USER_AGENT')
 
+REDDIT_TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
+REDDIT_API_URL = "https://oauth.reddit.com"
 
-nlp = spacy.load("en_core_web_sm")
 
 class ExpertAgent(BaseAgent):
     def __init__(self):
@@ -21,9 +28,12 @@ class ExpertAgent(BaseAgent):
             description="Scraps the web for real-time advice from other travelers and summarize response in helpful way",
             avatar="travel_avatar.png"
         )
+        self._reddit_http = None
+        self._reddit_token = None
+        self._reddit_token_expires = 0.0
 
     def extract_entities(self, text):
-        doc = nlp(text)
+        doc = get_nlp()(text)
         places = [ent.text for ent in doc.ents if ent.label_ in ["GPE", "LOC"]]
         return places
 
@@ -32,6 +42,10 @@ class ExpertAgent(BaseAgent):
         return blob.sentiment.polarity
 
     def scrape_reddit(self, location):
+        # Concurrent searches for the same place share one Reddit call (and one rate-limit hit)
+        return list(get_flight("reddit").do(normalize(location), lambda: self._search_reddit(location)))
+
+    def _search_reddit(self, location):
         reddit = praw.Reddit(client_id=client_id, client_secret=client_secret, user_agent=user_agent)
         print(list(reddit.subreddit('travel').hot(limit=1)))
         subreddit = reddit.subreddit('travel')
@@ -40,8 +54,50 @@ class ExpertAgent(BaseAgent):
             posts.append(post.title + " " + post.selftext)
         return posts
 
+    async def ascrape_reddit(self, location):
+        """Same search as scrape_reddit over Reddit's OAuth API, awaited instead of blocking a thread"""
+        return list(await get_flight("reddit").ado(normalize(location), lambda: self._asearch_reddit(location)))
+
+    async def _asearch_reddit(self, location):
+        if self._reddit_http is None:
+            self._reddit_http = httpx.AsyncClient(headers={"User-Agent": user_agent or "travel-agent"}, timeout=15)
+        if self._reddit_token is None or time.monotonic() >= self._reddit_token_expires:
+            # Application-only token, the same credentials praw uses for read-only access
+            response = await self._reddit_http.post(
+                REDDIT_TOKEN_URL,
+                data={"grant_type": "client_credentials"},
+                auth=(client_id or "", client_secret or "")
+            )
+            response.raise_for_status()
+            token = response.json()
+            self._reddit_token = token["access_token"]
+            self._reddit_token_expires = time.monotonic() + token.get("expires_in", 3600) - 60
+        response = await self._reddit_http.get(
+            f"{REDDIT_API_URL}/r/travel/search",
+            params={"q": location, "restrict_sr": "on", "sort": "relevance", "t": "all", "limit": 5, "raw_json": 1},
+            headers={"Authorization": f"bearer {self._reddit_token}"}
+        )
+        response.raise_for_status()
+        return [
+            child["data"].get("title", "") + " " + child["data"].get("selftext", "")
+            for child in response.json()["data"]["children"]
+        ]
+
     def get_travel_insights(self, query, location):
-        texts = self.scrape_reddit(location)
+        return self.get_response(self.insights_prompt(query, location))
+
+    async def aget_travel_insights(self, query, location):
+        return await self.aget_response(await self.ainsights_prompt(query, location))
+
+    def insights_prompt(self, query, location):
+        return self.prompt_from_posts(self.scrape_reddit(location), location)
+
+    async def ainsights_prompt(self, query, location):
+        texts = await self.ascrape_reddit(location)
+        # spaCy and TextBlob are CPU work; keep them off the event loop
+        return await asyncio.to_thread(self.prompt_from_posts, texts, location)
+
+    def prompt_from_posts(self, texts, location):
         prompt = f"Here is a collection of travel insights about {location} from reddit:"
         for text in texts:
             entities = self.extract_entities(text)
@@ -61,4 +117,4 @@ class ExpertAgent(BaseAgent):
         Then use a uniform scale of emojis to rate the sentiment of the place.
         Finally give some summarizing tips.
         """
-        return self.get_response(prompt)
+        return prompt
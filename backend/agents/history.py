@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import threading
+import time
+
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", os.path.join(".cache", "history.sqlite3"))
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "20"))
+HISTORY_TTL = float(os.getenv("HISTORY_TTL", str(7 * 24 * 3600)))
+
+
+class HistoryStore:
+    """Conversation turns per session id, in SQLite so every worker sees the same history.
+
+    Streaming responses send their headers (and so the session cookie) before the answer
+    exists, so turns are recorded here once the stream completes instead of in the cookie.
+    """
+
+    def __init__(self, path=HISTORY_DB_PATH, max_turns=HISTORY_MAX_TURNS, ttl=HISTORY_TTL):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, sid TEXT NOT NULL, user TEXT NOT NULL, "
+            "bot TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS turns_sid ON turns(sid, id)")
+        self._conn.commit()
+
+    def get(self, sid, limit=None):
+        """Most recent turns for a session, oldest first, as {"user", "bot"} dicts"""
+        limit = limit or self.max_turns
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user, bot FROM turns WHERE sid = ? AND created >= ? ORDER BY id DESC LIMIT ?",
+                (sid, time.time() - self.ttl, limit)
+            ).fetchall()
+        return [{"user": user, "bot": bot} for user, bot in reversed(rows)]
+
+    def append(self, sid, user, bot):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO turns (sid, user, bot, created) VALUES (?, ?, ?, ?)", (sid, user, bot, now)
+            )
+            # Keep only the newest turns of this session and drop expired sessions
+            self._conn.execute(
+                "DELETE FROM turns WHERE sid = ? AND id NOT IN "
+                "(SELECT id FROM turns WHERE sid = ? ORDER BY id DESC LIMIT ?)",
+                (sid, sid, self.max_turns)
+            )
+            self._conn.execute("DELETE FROM turns WHERE created < ?", (now - self.ttl,))
+            self._conn.commit()
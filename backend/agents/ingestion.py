@@ -0,0 +1,137 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.pdf_parsing import iter_pdf_pages
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+
+
+def batched(items, size):
+    """Split a list into consecutive slices of at most `size` items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class BatchIngestor:
+    """Embeds chunks in batches with bounded concurrency and writes each batch to Chroma"""
+
+    def __init__(self, collection, embedding_function, batch_size=INGEST_BATCH_SIZE, concurrency=INGEST_CONCURRENCY):
+        self.collection = collection
+        self.embedding_function = embedding_function
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+
+    def _embed(self, documents):
+        start = time.perf_counter()
+        embeddings = self.embedding_function(documents)
+        return embeddings, time.perf_counter() - start
+
+    def ingest(self, ids, documents, metadatas):
+        """Embed and store chunks, returning per-batch timings"""
+        batches = list(zip(
+            batched(ids, self.batch_size),
+            batched(documents, self.batch_size),
+            batched(metadatas, self.batch_size),
+        ))
+        timings = []
+        # Embedding calls run concurrently; Chroma writes stay on this thread so
+        # only one writer ever touches the collection.
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(self._embed, batch_docs) for _, batch_docs, _ in batches]
+            for n, ((batch_ids, batch_docs, batch_metas), future) in enumerate(zip(batches, futures)):
+                embeddings, embed_seconds = future.result()
+                start = time.perf_counter()
+                self.collection.upsert(
+                    ids=batch_ids,
+                    documents=batch_docs,
+                    metadatas=batch_metas,
+                    embeddings=embeddings
+                )
+                write_seconds = time.perf_counter() - start
+                timings.append({
+                    "batch": n,
+                    "size": len(batch_ids),
+                    "embed_seconds": embed_seconds,
+                    "write_seconds": write_seconds,
+                })
+                print(f"[ingest] batch {n + 1}/{len(batches)}: {len(batch_ids)} chunks, "
+                      f"embed {embed_seconds:.2f}s, write {write_seconds:.2f}s")
+        return timings
+
+
+def page_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sync_destination(collection, embedding_function, manifest, destination, pdf_file, text_splitter, fingerprint, force=False):
+    """Bring a destination's rows in line with its PDF, re-embedding only pages whose text changed.
+
+    Returns a summary dict with the number of pages re-chunked and chunk ids removed.
+    """
+    stat = os.stat(pdf_file)
+    previous = manifest.get(destination)
+    incremental = (
+        not force
+        and previous is not None
+        and previous.get("settings") == fingerprint
+        and "pages" in previous
+    )
+    old_pages = previous["pages"] if incremental else {}
+
+    ids, documents, metadatas = [], [], []
+    pages = {}
+    changed = 0
+    section = ""
+    for page_doc in iter_pdf_pages(pdf_file):
+        page = str(page_doc.metadata["page"])
+        # A page inherits the last heading of the page before it; hashing it in means a renamed
+        # section re-chunks the pages under it so their section metadata stays correct
+        page_doc.metadata["section"] = section
+        digest = page_hash(f"{section}\x00{page_doc.page_content}")
+        section = text_splitter.last_heading(page_doc.page_content, section)
+        if page in old_pages and old_pages[page]["hash"] == digest:
+            pages[page] = old_pages[page]
+            continue
+        changed += 1
+        chunks = text_splitter.split_documents([page_doc])
+        page_ids = [f"{destination}_p{page}_{digest[:10]}_{i}" for i in range(len(chunks))]
+        pages[page] = {"hash": digest, "ids": page_ids}
+        ids.extend(page_ids)
+        documents.extend(chunk.page_content for chunk in chunks)
+        metadatas.extend(
+            {"destination": destination, "page": int(page), "section": chunk.metadata.get("section", "")}
+            for chunk in chunks
+        )
+
+    if incremental:
+        # Ids of pages that changed or disappeared no longer exist in the new PDF
+        stale = [
+            chunk_id
+            for page, info in old_pages.items()
+            if pages.get(page) is not info
+            for chunk_id in info["ids"]
+        ]
+        if stale:
+            collection.delete(ids=stale)
+    else:
+        # Drop rows from any previous build (including legacy doc_{i} ids)
+        stale = []
+        collection.delete(where={"destination": destination})
+
+    if ids:
+        BatchIngestor(collection, embedding_function).ingest(ids, documents, metadatas)
+
+    manifest.update(destination, {
+        "pdf": os.path.basename(pdf_file),
+        "pdf_sha256": manifest.pdf_hash(pdf_file),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "settings": fingerprint,
+        "chunks": sum(len(info["ids"]) for info in pages.values()),
+        "pages": pages,
+    })
+    summary = {"pages": len(pages), "changed_pages": changed, "removed_chunks": len(stale), "added_chunks": len(ids)}
+    print(f"[ingest] {destination}: {summary}")
+    return summary
@@ -14,6 +14,9 @@ class ItineraryAgent(BaseAgent):
         )
 
     def plan_trip(self, from_city, destinations, interests, date_from, date_to, pace):
+        return self.get_response(self.trip_prompt(from_city, destinations, interests, date_from, date_to, pace))
+
+    def trip_prompt(self, from_city, destinations, interests, date_from, date_to, pace):
         # Validate inputs
         if not destinations:
             raise ValueError("No destinations provided")
@@ -68,4 +71,4 @@ class ItineraryAgent(BaseAgent):
             - Emojis for key points
             *Italics for local context details*
         """
-        return self.get_response(prompt)
+        return prompt
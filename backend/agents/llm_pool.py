@@ -0,0 +1,138 @@
+import os
+import threading
+
+import httpx
+from agno.models.groq import Groq
+from groq import AsyncGroq, Groq as GroqClient
+
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "32"))
+# Idle connections stay open this long, so bursts after a lull skip TCP and TLS setup
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "300"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+
+
+def _pool_usage(http_client):
+    """Open/idle/active connections in an httpx client's connection pool"""
+    pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+
+class PooledGroq(Groq):
+    """agno Groq model that takes its SDK clients from the process-wide registry on first use.
+
+    Building a groq.Groq client needs GROQ_API_KEY, so nothing is created until a request is
+    made; offline steps such as build_index.py construct agents without LLM secrets.
+    """
+
+    def get_client(self):
+        return get_llm_registry().clients()[0]
+
+    def get_async_client(self):
+        return get_llm_registry().clients()[1]
+
+
+class LLMClientRegistry:
+    """One sync and one async Groq client per process, on tuned keep-alive pools, shared by every agent.
+
+    Each agent still gets its own agno model object; only the HTTP clients (and so the
+    warm connections) are shared. New TCP connections and TLS handshakes are counted
+    through httpcore's trace hook to show how often connection setup is still paid.
+    """
+
+    def __init__(self, max_connections=LLM_MAX_CONNECTIONS, max_keepalive=LLM_MAX_KEEPALIVE,
+                 keepalive_expiry=LLM_KEEPALIVE_EXPIRY, timeout=LLM_TIMEOUT, connect_timeout=LLM_CONNECT_TIMEOUT):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.counts = {"requests": 0, "responses": 0, "errors": 0, "connections_opened": 0, "tls_handshakes": 0}
+        self._lock = threading.Lock()
+        self._http = None
+        self._async_http = None
+        self._client = None
+        self._async_client = None
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def _trace(self, event, info):
+        if event == "connection.connect_tcp.complete":
+            self._count("connections_opened")
+        elif event == "connection.start_tls.complete":
+            self._count("tls_handshakes")
+
+    async def _atrace(self, event, info):
+        self._trace(event, info)
+
+    def _on_request(self, request):
+        self._count("requests")
+        request.extensions["trace"] = self._trace
+
+    async def _aon_request(self, request):
+        self._count("requests")
+        request.extensions["trace"] = self._atrace
+
+    def _on_response(self, response):
+        self._count("errors" if response.status_code >= 400 else "responses")
+
+    async def _aon_response(self, response):
+        self._on_response(response)
+
+    def clients(self):
+        """(sync Groq SDK client, async Groq SDK client), created on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    http = httpx.Client(
+                        limits=self.limits,
+                        timeout=self.timeout,
+                        event_hooks={"request": [self._on_request], "response": [self._on_response]},
+                    )
+                    async_http = httpx.AsyncClient(
+                        limits=self.limits,
+                        timeout=self.timeout,
+                        event_hooks={"request": [self._aon_request], "response": [self._aon_response]},
+                    )
+                    # Raises without GROQ_API_KEY; nothing is kept so the next request retries
+                    client, async_client = GroqClient(http_client=http), AsyncGroq(http_client=async_http)
+                    self._http, self._async_http = http, async_http
+                    self._client, self._async_client = client, async_client
+        return self._client, self._async_client
+
+    def model(self, model_id=LLM_MODEL):
+        """A new agno Groq model that reuses the shared clients once it makes its first request"""
+        return PooledGroq(id=model_id)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counts)
+        requests = stats["requests"]
+        stats["connection_reuse_rate"] = 1 - stats["connections_opened"] / requests if requests else 0.0
+        stats["max_connections"] = self.limits.max_connections
+        stats["max_keepalive"] = self.limits.max_keepalive_connections
+        if self._http is not None:
+            stats["sync_pool"] = _pool_usage(self._http)
+            stats["async_pool"] = _pool_usage(self._async_http)
+        return stats
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_llm_registry():
+    """The process-wide LLMClientRegistry"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = LLMClientRegistry()
+    return _registry
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: fall back to unlocked access
+    fcntl = None
+
+MANIFEST_NAME = "ingest_manifest.json"
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Content hash of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def settings_fingerprint(settings):
+    """Stable hash of the chunker/embedding settings an index was built with"""
+    payload = json.dumps(settings, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+class IngestManifest:
+    """Records which destination PDFs are indexed, shared by every process using the same store"""
+
+    def __init__(self, store_path, collection_name="destination_docs"):
+        os.makedirs(store_path, exist_ok=True)
+        self.collection_name = collection_name
+        name = MANIFEST_NAME if collection_name == "destination_docs" else f"ingest_manifest_{collection_name}.json"
+        self.path = os.path.join(store_path, name)
+        self.lock_dir = os.path.join(store_path, ".locks")
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._cache = {}
+        self._cache_mtime = None
+        self._hashes = {}
+
+    def _read(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime != self._cache_mtime:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._cache = json.load(f)
+            self._cache_mtime = mtime
+        return self._cache
+
+    def get(self, destination):
+        return self._read().get(destination)
+
+    def version(self, destination=None):
+        """Changes whenever the destination (or, without one, any destination) is re-indexed"""
+        if destination:
+            return (self.get(destination) or {}).get("indexed_at")
+        self._read()
+        return self._cache_mtime
+
+    def entries(self):
+        return dict(self._read())
+
+    def pdf_hash(self, pdf_file):
+        """Content hash of a PDF, memoised on (mtime, size) so unchanged files are not re-read"""
+        stat = os.stat(pdf_file)
+        key = (pdf_file, stat.st_mtime_ns, stat.st_size)
+        if key not in self._hashes:
+            self._hashes[key] = file_sha256(pdf_file)
+        return self._hashes[key]
+
+    def is_current(self, destination, pdf_file, fingerprint):
+        """True if the PDF and settings match the indexed entry; mtime/size skip hashing unchanged files"""
+        entry = self.get(destination)
+        if not entry or entry.get("settings") != fingerprint:
+            return False
+        stat = os.stat(pdf_file)
+        if entry.get("mtime_ns") == stat.st_mtime_ns and entry.get("size") == stat.st_size:
+            return True
+        return entry.get("pdf_sha256") == self.pdf_hash(pdf_file)
+
+    @contextmanager
+    def _file_lock(self, name):
+        with open(os.path.join(self.lock_dir, f"{name}.lock"), "w") as handle:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def building(self, destination):
+        """Exclusive lock held while a destination is (re)indexed, so workers don't race"""
+        return self._file_lock(f"build-{self.collection_name}-{destination}")
+
+    def update(self, destination, entry):
+        """Atomically write one destination's entry, merging with entries from other processes"""
+        with self._file_lock(f"manifest-{self.collection_name}"):
+            self._cache_mtime = None
+            data = dict(self._read())
+            data[destination] = dict(entry, indexed_at=time.time())
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._cache_mtime = None
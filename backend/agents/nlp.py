@@ -0,0 +1,16 @@
+import threading
+
+import spacy
+
+_nlp = None
+_lock = threading.Lock()
+
+
+def get_nlp():
+    """The process-wide en_core_web_sm pipeline, loaded once on first use"""
+    global _nlp
+    if _nlp is None:
+        with _lock:
+            if _nlp is None:
+                _nlp = spacy.load("en_core_web_sm")
+    return _nlp
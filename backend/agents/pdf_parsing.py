@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+# The pool is created from request and warm-up threads; forking a multi-threaded process can
+# deadlock the child, so workers start from a clean forkserver (spawn where that is unavailable)
+PDF_PARSE_START_METHOD = os.getenv(
+    "PDF_PARSE_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _parse_context():
+    context = multiprocessing.get_context(PDF_PARSE_START_METHOD)
+    if PDF_PARSE_START_METHOD == "forkserver":
+        # The default preload is __main__, which under `python main.py` would build the agents,
+        # open the stores and start a warm-up inside the fork server; workers only need this module
+        context.set_forkserver_preload(["agents.pdf_parsing"])
+    return context
+
+
+def get_parse_pool():
+    """Process pool shared by every PDF parse in this process, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_PARSE_WORKERS, mp_context=_parse_context())
+        return _pool
+
+
+def _extract_pages(pdf_file, start, stop):
+    # Runs in a worker process; each task opens its own reader
+    reader = PdfReader(pdf_file)
+    return [(i, reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+def iter_pdf_pages(pdf_file, workers=PDF_PARSE_WORKERS, pages_per_task=PDF_PAGES_PER_TASK):
+    """Yield one Document per page, in page order, with text extracted across a process pool"""
+    num_pages = len(PdfReader(pdf_file).pages)
+    ranges = [(start, min(start + pages_per_task, num_pages)) for start in range(0, num_pages, pages_per_task)]
+
+    if workers <= 1 or len(ranges) <= 1:
+        results = (_extract_pages(pdf_file, start, stop) for start, stop in ranges)
+    else:
+        pool = get_parse_pool()
+        futures = [pool.submit(_extract_pages, pdf_file, start, stop) for start, stop in ranges]
+        # Waiting on futures in submission order keeps pages ordered while later ranges keep parsing
+        results = (future.result() for future in futures)
+
+    for pages in results:
+        for page, text in pages:
+            yield Document(page_content=text, metadata={"source": pdf_file, "page": page})
+
+
+def load_and_split(pdf_file, text_splitter):
+    """Parallel replacement for PyPDFLoader(pdf_file).load_and_split(text_splitter)"""
+    chunks = []
+    for page_doc in iter_pdf_pages(pdf_file):
+        chunks.extend(text_splitter.split_documents([page_doc]))
+    return chunks
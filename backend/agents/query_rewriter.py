@@ -0,0 +1,127 @@
+import os
+import re
+import threading
+
+from agents.nlp import get_nlp
+
+# Below this confidence the local rewrite is not trusted and the LLM rewrite is used instead
+REWRITE_MIN_CONFIDENCE = float(os.getenv("REWRITE_MIN_CONFIDENCE", "0.6"))
+
+REFERRING_WORDS = {"it", "its", "there", "they", "them", "their", "that", "those", "this", "these", "here"}
+ELLIPSIS_PREFIXES = ("how about", "what about", "and what about", "and how about", "and", "also", "what else")
+MORE_PHRASES = ("tell me more", "more about", "more info", "anything else", "what else")
+PLACE_LABELS = ("GPE", "LOC", "FAC")
+
+_WORD = re.compile(r"[a-z']+")
+
+
+class QueryRewriter:
+    """Resolves pronouns and ellipsis in follow-up questions against recent history, without an LLM.
+
+    The LLM rewrite is only called when the local resolution is not confident; counters record
+    how often each path is taken.
+    """
+
+    def __init__(self, resolver=None, llm_rewrite=None, min_confidence=REWRITE_MIN_CONFIDENCE, allm_rewrite=None):
+        self.resolver = resolver
+        self.llm_rewrite = llm_rewrite
+        self.allm_rewrite = allm_rewrite
+        self.min_confidence = min_confidence
+        self.counts = {"standalone": 0, "local": 0, "llm_fallback": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def is_followup(self, query, history):
+        """Whole-word pronoun/ellipsis cues; "Italy" no longer matches "it" """
+        if not history:
+            return False
+        text = query.strip().lower()
+        words = set(_WORD.findall(text))
+        return (
+            bool(words & REFERRING_WORDS)
+            or text.startswith(ELLIPSIS_PREFIXES)
+            or any(phrase in text for phrase in MORE_PHRASES)
+        )
+
+    def places(self, text):
+        """Places mentioned in text: spaCy entities first, then known destination aliases"""
+        found = [ent.text for ent in get_nlp()(text).ents if ent.label_ in PLACE_LABELS]
+        if not found and self.resolver:
+            canonical = self.resolver.resolve(text)
+            if canonical:
+                found = [canonical.title()]
+        return found
+
+    def find_topic(self, history):
+        """(place, confidence) for the place the conversation is most recently about"""
+        for age, turn in enumerate(reversed(history[-3:])):
+            places = list(dict.fromkeys(self.places(turn.get("user", ""))))
+            if len(places) == 1:
+                return places[0], 0.9 if age == 0 else 0.7
+            if len(places) > 1:
+                # "compare Austria and Italy" -> which one does "there" mean?
+                return places[-1], 0.4
+        # Only the bot named a place; its answers often mention several
+        for turn in reversed(history[-1:]):
+            places = list(dict.fromkeys(self.places(turn.get("bot", "")[:1000])))
+            if places:
+                return places[0], 0.5 if len(places) == 1 else 0.3
+        return None, 0.0
+
+    def rewrite(self, query, history):
+        """(standalone query, confidence) using the recent topic"""
+        if self.places(query):
+            # Already names its own place, e.g. "how about Vienna?"
+            return query, 1.0
+        topic, confidence = self.find_topic(history)
+        if not topic:
+            return query, 0.0
+
+        text = query.strip().rstrip("?.!").strip()
+        lowered = text.lower()
+        for prefix in sorted(ELLIPSIS_PREFIXES, key=len, reverse=True):
+            if lowered.startswith(prefix + " "):
+                # "how about the food?" -> "the food in Austria"
+                return f"{text[len(prefix):].strip()} in {topic}", confidence
+
+        if lowered in MORE_PHRASES:
+            return f"{text} about {topic}", confidence
+
+        replaced, n = re.subn(r"\b(?:over )?there\b(?=\s*$)", f"in {topic}", text, flags=re.IGNORECASE)
+        if not n:
+            replaced, n = re.subn(r"\b(?:it|this place|that place)\b(?=\s*$)", topic, text, flags=re.IGNORECASE)
+        if not n:
+            replaced = f"{text} in {topic}"
+        return replaced + ("?" if query.rstrip().endswith("?") else ""), confidence
+
+    def _resolve_locally(self, query, history, llm_rewrite):
+        """(query, done): done is False when the LLM rewrite should be used instead"""
+        if not history or not self.is_followup(query, history):
+            self._count("standalone")
+            return query, True
+        rewritten, confidence = self.rewrite(query, history)
+        if confidence >= self.min_confidence or llm_rewrite is None:
+            self._count("local")
+            return rewritten, True
+        self._count("llm_fallback")
+        return query, False
+
+    def resolve(self, query, history):
+        """Standalone version of query; falls back to the LLM rewrite when not confident"""
+        resolved, done = self._resolve_locally(query, history, self.llm_rewrite)
+        return resolved if done else self.llm_rewrite(query, history)
+
+    async def aresolve(self, query, history):
+        """resolve() with the async LLM rewrite"""
+        resolved, done = self._resolve_locally(query, history, self.allm_rewrite)
+        return resolved if done else await self.allm_rewrite(query, history)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        followups = counts["local"] + counts["llm_fallback"]
+        counts["llm_fallback_rate"] = counts["llm_fallback"] / followups if followups else 0.0
+        return counts
@@ -0,0 +1,189 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+
+# Alternative names, demonyms and major places for each guide. Keys must match the PDF base names;
+# entries for destinations without a PDF are ignored until a guide is added.
+DESTINATION_ALIASES = {
+    "austria": [
+        "österreich", "osterreich", "austrian", "austrians", "austrian alps", "vienna", "wien",
+        "salzburg", "innsbruck", "hallstatt", "graz", "linz", "tyrol", "tirol", "wachau",
+    ],
+    "france": [
+        "french", "la france", "paris", "lyon", "marseille", "bordeaux", "provence", "french riviera",
+        "cote d'azur", "normandy", "loire valley", "strasbourg", "chamonix", "mont saint-michel", "alsace",
+    ],
+    "italy": [
+        "italia", "italian", "italians", "rome", "roma", "florence", "firenze", "venice", "venezia",
+        "milan", "milano", "naples", "napoli", "tuscany", "amalfi coast", "cinque terre", "sicily",
+        "sardinia", "lake como", "dolomites", "pisa", "verona", "bologna",
+    ],
+    "switzerland": [
+        "swiss", "schweiz", "suisse", "svizzera", "swiss alps", "zurich", "geneva", "geneve", "bern",
+        "lucerne", "luzern", "interlaken", "zermatt", "lausanne", "basel", "jungfrau", "matterhorn",
+        "lugano", "st moritz", "grindelwald",
+    ],
+}
+
+RESOLVER_REFRESH_SECONDS = float(os.getenv("RESOLVER_REFRESH_SECONDS", "30"))
+FUZZY_MIN_LENGTH = 5
+_MEMO_LIMIT = 4096
+
+
+def normalize(text):
+    """Casefold, strip accents and punctuation: "Zürich!" -> "zurich" """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def within_one_edit(a, b):
+    """True if a and b differ by at most one insertion, deletion, substitution or adjacent swap.
+
+    Stricter than a similarity ratio: "itlay" -> "italy" matches, "australia" -> "austria" does not.
+    """
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    start = 0
+    while start < len(a) and a[start] == b[start]:
+        start += 1
+    if start == len(a):
+        return True
+    if len(a) < len(b):
+        return a[start:] == b[start + 1:]
+    return a[start + 1:] == b[start + 1:] or (
+        a[start + 2:] == b[start + 2:] and a[start:start + 2] == b[start:start + 2][::-1]
+    )
+
+
+class DestinationResolver:
+    """In-memory index from names, aliases and cities to the destination guide PDFs"""
+
+    def __init__(self, pdf_path, aliases=DESTINATION_ALIASES, refresh_seconds=RESOLVER_REFRESH_SECONDS):
+        self.pdf_path = pdf_path
+        self.aliases = aliases
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._dir_mtime = None
+        self._checked_at = 0.0
+        self._build()
+
+    def _build(self):
+        pdf_files = {}
+        for fname in os.listdir(self.pdf_path):
+            if fname.lower().endswith(".pdf"):
+                pdf_files[os.path.splitext(fname)[0].lower()] = os.path.join(self.pdf_path, fname)
+
+        index = {}
+        for canonical in pdf_files:
+            index[normalize(canonical)] = canonical
+            for alias in self.aliases.get(canonical, []):
+                index.setdefault(normalize(alias), canonical)
+
+        # Swap in the new tables together so readers never see a half-built index
+        self.pdf_files = pdf_files
+        self.index = index
+        self.fuzzy_keys = [key for key in index if len(key) >= FUZZY_MIN_LENGTH]
+        self.max_phrase = max((len(key.split()) for key in index), default=1)
+        self._memo = {}
+        self._dir_mtime = os.stat(self.pdf_path).st_mtime_ns
+        self._checked_at = time.monotonic()
+
+    def _maybe_refresh(self):
+        # Only stat the directory every refresh_seconds; lookups in between touch no files
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.refresh_seconds:
+                return
+            self._checked_at = time.monotonic()
+            if os.stat(self.pdf_path).st_mtime_ns != self._dir_mtime:
+                self._build()
+
+    def destinations(self):
+        self._maybe_refresh()
+        return sorted(self.pdf_files)
+
+    def pdf_for(self, canonical):
+        self._maybe_refresh()
+        return self.pdf_files.get(canonical)
+
+    def name_terms(self, canonicals=None):
+        """Words of the given destinations' own names (all of them by default); aliases such as
+        "hallstatt" are left out since they pick out specific places within a guide"""
+        self._maybe_refresh()
+        return {word for canonical in canonicals or self.pdf_files for word in normalize(canonical).split()}
+
+    def _scan(self, text):
+        """(destination, name matched) for every destination mentioned in text, in order of first mention"""
+        key = normalize(text)
+        if key in self.index:
+            return [(self.index[key], key)]
+
+        tokens = key.split()
+        found = []
+        # Longest phrases first so "swiss alps" wins over "swiss" and "alps"
+        taken = [False] * len(tokens)
+        hits = []
+        for size in range(min(self.max_phrase, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                if any(taken[start:start + size]):
+                    continue
+                phrase = " ".join(tokens[start:start + size])
+                canonical = self.index.get(phrase)
+                if canonical:
+                    hits.append((start, canonical, phrase))
+                    taken[start:start + size] = [True] * size
+        if not hits:
+            # Typos such as "itlay" or "swizterland", but only in a name-like input: ordinary words in
+            # a sentence are often one edit from a place ("parts" -> "paris", "basil" -> "basel"),
+            # so there only capitalised words after the first are tried
+            if len(tokens) <= self.max_phrase:
+                candidates = set(tokens)
+            else:
+                words = re.findall(r"\w+", text)[1:]
+                candidates = {normalize(word) for word in words if word[0].isupper()}
+            for start, token in enumerate(tokens):
+                if len(token) >= FUZZY_MIN_LENGTH and token in candidates:
+                    close = {key: self.index[key] for key in self.fuzzy_keys if within_one_edit(token, key)}
+                    # Skip tokens one edit away from two different destinations
+                    if len(set(close.values())) == 1:
+                        name = min(close)
+                        hits.append((start, close[name], name))
+        for _, canonical, name in sorted(hits):
+            if canonical not in (match[0] for match in found):
+                found.append((canonical, name))
+        return found
+
+    def _matches(self, text):
+        self._maybe_refresh()
+        memo = self._memo
+        if text not in memo:
+            if len(memo) >= _MEMO_LIMIT:
+                memo.clear()
+            memo[text] = self._scan(text)
+        return memo[text]
+
+    def resolve(self, text):
+        """Canonical destination for free text ("the French Riviera" -> "france"), or None"""
+        if not text:
+            return None
+        matches = self._matches(text)
+        return matches[0][0] if matches else None
+
+    def resolve_name(self, text):
+        """(destination, name it matched by) for free text ("trip to Vienna" -> ("austria", "vienna")) or None"""
+        if not text:
+            return None
+        matches = self._matches(text)
+        return matches[0] if matches else None
+
+    def resolve_all(self, text):
+        """Every destination mentioned in text, in order ("compare Austria and Switzerland")"""
+        if not text:
+            return []
+        return [canonical for canonical, _ in self._matches(text)]
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "1") == "1"
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+# How long past its TTL an entry may still be served while a background refresh runs; 0 disables
+RESPONSE_CACHE_STALE_SECONDS = float(os.getenv("RESPONSE_CACHE_STALE_SECONDS", "86400"))
+# Hits only refresh an entry's LRU position when it was last touched longer ago than this
+RESPONSE_CACHE_TOUCH_SECONDS = float(os.getenv("RESPONSE_CACHE_TOUCH_SECONDS", "600"))
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so re-indented prompt templates still hit the same entry"""
+    return " ".join(prompt.split())
+
+
+def response_key(model_id, prompt, params):
+    payload = json.dumps({"model": model_id, "prompt": normalize_prompt(prompt), "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Persistent exact-match cache of LLM responses with per-entry TTL and stale-while-revalidate"""
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 stale_seconds=RESPONSE_CACHE_STALE_SECONDS, touch_seconds=RESPONSE_CACHE_TOUCH_SECONDS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self.touch_seconds = touch_seconds
+        # key -> last use not yet written; flushed with the next put, before anything is evicted
+        self._touched = {}
+        self.counts = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        """(response, fresh) or None; expired entries within the stale window come back with fresh=False.
+
+        Never writes: LRU positions older than touch_seconds are refreshed in memory and written
+        with the next put.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires, last_used FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now >= row[1] + self.stale_seconds:
+                self.counts["misses"] += 1
+                return None
+            fresh = now < row[1]
+            self.counts["hits" if fresh else "stale_hits"] += 1
+            if now - row[2] > self.touch_seconds:
+                self._touched[key] = now
+        return row[0], fresh
+
+    def put(self, key, response, ttl):
+        now = time.time()
+        with self._lock:
+            if self._touched:
+                self._conn.executemany(
+                    "UPDATE responses SET last_used = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()]
+                )
+                self._touched.clear()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, expires, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now + ttl, now)
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def refresh(self, key, generate, ttl):
+        """Regenerate a stale entry in the background; at most one refresh per key at a time"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.put(key, generate(), ttl)
+                self._count("refreshes")
+            except Exception as e:
+                print(f"[response-cache] refresh failed: {e}")
+                self._count("refresh_errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="response-cache-refresh", daemon=True).start()
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counts)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """The process-wide ResponseCache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,80 @@
+import os
+
+# Weight of the dense (vector) score in the fused ranking; 0 = lexical only, 1 = vector only
+HYBRID_WEIGHT = float(os.getenv("HYBRID_WEIGHT", "0.5"))
+# Normalized BM25 score above which lexical hits are trusted without embedding the query
+# (1.0 ~ the top chunk contains every query term); set it very high to always embed
+LEXICAL_SHORTCUT = float(os.getenv("LEXICAL_SHORTCUT", "1.0"))
+# Only terms in at most this share of the searched chunks count towards the shortcut score;
+# destination names and other near-ubiquitous terms say nothing about which chunk is relevant
+LEXICAL_SHORTCUT_MAX_DF = float(os.getenv("LEXICAL_SHORTCUT_MAX_DF", "0.2"))
+# How many candidates each retriever contributes per requested result
+CANDIDATE_MULTIPLIER = int(os.getenv("CANDIDATE_MULTIPLIER", "3"))
+
+
+def _min_max(values, higher_is_better=True):
+    if not values:
+        return []
+    low, high = min(values), max(values)
+    if high == low:
+        return [1.0] * len(values)
+    if higher_is_better:
+        return [(v - low) / (high - low) for v in values]
+    return [(high - v) / (high - low) for v in values]
+
+
+def dense_hits(results):
+    """Flatten a single-query Chroma result into hit dicts"""
+    if not results.get("ids") or not results["ids"][0]:
+        return []
+    metadatas = results.get("metadatas") or [[{}] * len(results["ids"][0])]
+    distances = results.get("distances") or [[0.0] * len(results["ids"][0])]
+    return [
+        {
+            "id": doc_id,
+            "document": document,
+            "destination": (metadata or {}).get("destination"),
+            "distance": distance,
+        }
+        for doc_id, document, metadata, distance in zip(
+            results["ids"][0], results["documents"][0], metadatas[0], distances[0]
+        )
+    ]
+
+
+def lexical_hits(index, matches):
+    return [
+        {
+            "id": doc_id,
+            "document": index.document(doc_id),
+            "destination": index.doc_destination.get(doc_id),
+            "bm25": score,
+        }
+        for doc_id, score, _ in matches
+    ]
+
+
+def fuse(dense, lexical, k, weight=HYBRID_WEIGHT):
+    """Weighted sum of min-max normalised dense similarity and BM25 score, top k"""
+    merged = {}
+    for hit, score in zip(dense, _min_max([h["distance"] for h in dense], higher_is_better=False)):
+        merged[hit["id"]] = dict(hit, score=weight * score)
+    for hit, score in zip(lexical, _min_max([h["bm25"] for h in lexical])):
+        entry = merged.setdefault(hit["id"], dict(hit, score=0.0))
+        entry["score"] += (1 - weight) * score
+    return sorted(merged.values(), key=lambda h: h["score"], reverse=True)[:k]
+
+
+def balance(hits, destinations, quota):
+    """Top quota hits per destination, interleaved by rank so no destination crowds out the others"""
+    if len(destinations) <= 1:
+        return hits[:quota]
+    per_destination = {dest: [] for dest in destinations}
+    for hit in hits:
+        bucket = per_destination.get(hit["destination"])
+        if bucket is not None and len(bucket) < quota:
+            bucket.append(hit)
+    merged = []
+    for rank in range(quota):
+        merged.extend(bucket[rank] for bucket in per_destination.values() if rank < len(bucket))
+    return merged
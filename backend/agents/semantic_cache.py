@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Cosine similarity above which a previous answer is reused for a new question
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "2000"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", str(6 * 3600)))
+# Endpoints the cache serves, comma-separated; remove one to switch it off there ("" disables everywhere)
+SEMANTIC_CACHE_ENDPOINTS = {
+    name.strip() for name in os.getenv("SEMANTIC_CACHE_ENDPOINTS", "destination,destination_stream").split(",")
+    if name.strip()
+}
+
+
+def semantic_cache_enabled(endpoint):
+    return endpoint in SEMANTIC_CACHE_ENDPOINTS
+
+
+class SemanticCache:
+    """Previous answers, found again by embedding similarity of the question within the same scope.
+
+    A scope is everything besides the wording that changes the answer (destination, PDF mode,
+    index version), so paraphrases match but "Austria" never serves a "Switzerland" answer.
+    Entries are evicted least-recently-used beyond maxsize and expire after ttl seconds.
+    """
+
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, maxsize=SEMANTIC_CACHE_SIZE, ttl=SEMANTIC_CACHE_TTL):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # id -> (scope, unit vector, answer, expires)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(np.linalg.norm(vector), 1e-12)
+
+    def lookup(self, scope, vector):
+        """(answer, similarity) of the closest live entry in scope above the threshold, or None"""
+        query = self._unit(vector)
+        now = time.monotonic()
+        with self._lock:
+            expired = [entry_id for entry_id, entry in self._entries.items() if entry[3] <= now]
+            for entry_id in expired:
+                del self._entries[entry_id]
+            candidates = [(entry_id, entry) for entry_id, entry in self._entries.items() if entry[0] == scope]
+            best_id, best_similarity = None, -1.0
+            if candidates:
+                similarities = np.stack([entry[1] for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                best_id, best_similarity = candidates[best][0], float(similarities[best])
+            if best_id is None or best_similarity < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2], best_similarity
+
+    def store(self, scope, vector, answer):
+        with self._lock:
+            self._entries[self._next_id] = (scope, self._unit(vector), answer, time.monotonic() + self.ttl)
+            self._next_id += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "threshold": self.threshold,
+                "endpoints": sorted(SEMANTIC_CACHE_ENDPOINTS),
+            }
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one upstream call whose result they all share.
+
+    do() works across threads in a process; ado() across tasks on one event loop. Nothing is
+    cached: once the call finishes, the next caller with that key starts a new one.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+
+    def _join(self, calls, key, new_call):
+        """(call, leader): the in-flight call for key, or a newly registered one if this caller leads"""
+        with self._lock:
+            self.counts["calls"] += 1
+            call = calls.get(key)
+            if call is not None:
+                self.counts["coalesced"] += 1
+                return call, False
+            self.counts["executions"] += 1
+            call = calls[key] = new_call()
+            return call, True
+
+    def _finish(self, calls, key, failed):
+        with self._lock:
+            calls.pop(key, None)
+            if failed:
+                self.counts["errors"] += 1
+
+    def do(self, key, fn):
+        call, leader = self._join(self._calls, key, _Call)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(self._calls, key, call.error is not None)
+            call.done.set()
+        return call.result
+
+    async def ado(self, key, coroutine_fn):
+        future, leader = self._join(self._async_calls, key, lambda: asyncio.get_running_loop().create_future())
+        if not leader:
+            # shield: one waiter being cancelled must not cancel the shared call
+            return await asyncio.shield(future)
+        try:
+            result = await coroutine_fn()
+        except BaseException as e:
+            self._finish(self._async_calls, key, True)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark retrieved so an exception nobody else awaited is not logged as unhandled
+                future.exception()
+            raise
+        self._finish(self._async_calls, key, False)
+        future.set_result(result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counts)
+            stats["in_flight"] = len(self._calls) + len(self._async_calls)
+        stats["coalesced_rate"] = stats["coalesced"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def get_flight(name):
+    """The process-wide SingleFlight group for name, e.g. "llm" or "reddit" """
+    with _flights_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight(name)
+        return _flights[name]
+
+
+def flight_stats():
+    with _flights_lock:
+        flights = dict(_flights)
+    return {name: flight.stats() for name, flight in flights.items()}
@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Collects wall-clock time per named pipeline stage"""
+
+    def __init__(self):
+        self.stages = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def mark(self, name):
+        """Record the time elapsed since the timer was created, e.g. time to first token"""
+        self.stages.setdefault(name, time.perf_counter() - self._start)
+
+    def report(self):
+        """Milliseconds per stage plus the total since the timer was created"""
+        report = {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+        report["total"] = round((time.perf_counter() - self._start) * 1000, 1)
+        return report
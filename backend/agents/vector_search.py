@@ -0,0 +1,164 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: builds are only serialised within the process
+    fcntl = None
+
+# "chroma" queries the HNSW collection; "numpy" does exact search over a memory-mapped matrix
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")
+
+
+class NumpyVectorIndex:
+    """Exact cosine top-k over a destination-sorted embedding matrix, memory-mapped read-only.
+
+    Every worker maps the same file, so the OS page cache holds one copy of the vectors.
+    """
+
+    def __init__(self, directory, dtype=VECTOR_DTYPE):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.matrix_path = os.path.join(directory, "vectors.npy")
+        self.meta_path = os.path.join(directory, "vectors.json")
+        self.matrix = None
+        self.ids = []
+        self.documents = []
+        self.row_destinations = []
+        self.ranges = {}
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    @contextmanager
+    def _building(self):
+        """Held for a whole build so concurrent builds (threads or workers) publish one matching pair of files"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._build_lock, open(os.path.join(self.directory, "vectors.lock"), "w") as handle:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _temp_path(self, path, suffix):
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=suffix, dir=self.directory)
+        os.close(fd)
+        return tmp_path
+
+    def build(self, *collections):
+        """Snapshot every row of the collections into the matrix file, atomically replacing the old one"""
+        with self._building():
+            temp_paths = []
+            try:
+                self._build(collections, temp_paths)
+            finally:
+                # Only left behind if the build failed before publishing
+                for path in temp_paths:
+                    if os.path.exists(path):
+                        os.remove(path)
+        self.reload()
+
+    def _build(self, collections, temp_paths):
+        rows = {"ids": [], "embeddings": [], "documents": [], "metadatas": []}
+        for collection in collections:
+            part = collection.get(include=["embeddings", "documents", "metadatas"])
+            for field in rows:
+                rows[field].extend(part[field])
+        order = sorted(
+            range(len(rows["ids"])),
+            key=lambda i: ((rows["metadatas"][i] or {}).get("destination", ""), rows["ids"][i])
+        )
+        dim = len(rows["embeddings"][0]) if order else 0
+        tmp_matrix = self._temp_path(self.matrix_path, ".tmp.npy")
+        temp_paths.append(tmp_matrix)
+        matrix = np.lib.format.open_memmap(tmp_matrix, mode="w+", dtype=self.dtype, shape=(len(order), dim))
+
+        ranges = {}
+        for row, i in enumerate(order):
+            vector = np.asarray(rows["embeddings"][i], dtype=np.float32)
+            matrix[row] = vector / max(np.linalg.norm(vector), 1e-12)
+            destination = (rows["metadatas"][i] or {}).get("destination", "")
+            start, _ = ranges.get(destination, (row, row))
+            ranges[destination] = (start, row + 1)
+        matrix.flush()
+        del matrix
+
+        meta = {
+            "dtype": self.dtype.name,
+            "ids": [rows["ids"][i] for i in order],
+            "documents": [rows["documents"][i] for i in order],
+            "ranges": ranges,
+        }
+        tmp_meta = self._temp_path(self.meta_path, ".tmp")
+        temp_paths.append(tmp_meta)
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        # Matrix first, then metadata: readers reload when the metadata file changes
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_meta, self.meta_path)
+
+    def reload(self):
+        """Map the current files if another process (or build()) replaced them"""
+        try:
+            mtime = os.stat(self.meta_path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._loaded_mtime:
+            return True
+        with self._lock:
+            if mtime != self._loaded_mtime:
+                with open(self.meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                self.matrix = np.load(self.matrix_path, mmap_mode="r")
+                self.ids = meta["ids"]
+                self.documents = meta["documents"]
+                self.ranges = {dest: tuple(bounds) for dest, bounds in meta["ranges"].items()}
+                self.row_destinations = [None] * len(self.ids)
+                for dest, (start, stop) in self.ranges.items():
+                    self.row_destinations[start:stop] = [dest] * (stop - start)
+                self._loaded_mtime = mtime
+        return True
+
+    def has(self, destinations=None):
+        if not self.reload() or self.matrix is None or not len(self.ids):
+            return False
+        return not destinations or all(dest in self.ranges for dest in destinations)
+
+    def search(self, query_embedding, k, destinations=None):
+        """Top-k hit dicts by cosine similarity; distance is 1 - similarity as in Chroma's cosine space"""
+        if not self.has():
+            return []
+        # New array: cached query vectors are read-only views and belong to the caller
+        query = np.array(query_embedding, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+
+        if destinations:
+            spans = [self.ranges[dest] for dest in destinations if dest in self.ranges]
+        else:
+            spans = [(0, len(self.ids))]
+        if not spans:
+            return []
+        rows = np.concatenate([np.arange(start, stop) for start, stop in spans])
+        scores = np.concatenate([self.matrix[start:stop] @ query for start, stop in spans]).astype(np.float32)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "id": self.ids[rows[i]],
+                "document": self.documents[rows[i]],
+                "destination": self.row_destinations[rows[i]],
+                "distance": float(1.0 - scores[i]),
+            }
+            for i in top
+        ]
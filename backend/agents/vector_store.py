@@ -0,0 +1,105 @@
+import os
+import re
+import threading
+
+from chromadb import HttpClient, PersistentClient
+
+# The one store every entry point uses, independent of the working directory
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chroma_db")
+CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", DEFAULT_DB_PATH)
+# "embedded" opens the SQLite store in-process; "http" talks to a local `chroma run` server that
+# owns the store, so workers share one copy of the index and one writer
+CHROMA_MODE = os.getenv("CHROMA_MODE", "embedded")
+CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+# 1 = one collection (HNSW index) per destination instead of one filtered shared collection
+VECTOR_SHARDING = os.getenv("VECTOR_SHARDING", "0") == "1"
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def store_path(db_path=None):
+    """Absolute path of the vector store (manifest, locks and numpy matrix live here in every mode)"""
+    return os.path.abspath(db_path or CHROMA_DB_PATH)
+
+
+def get_client(db_path=None, mode=None):
+    """Process-wide Chroma client for the store, created once and reused by every agent and request"""
+    mode = mode or CHROMA_MODE
+    key = (mode, CHROMA_HOST, CHROMA_PORT) if mode == "http" else (mode, store_path(db_path))
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = create_client(store_path(db_path), mode)
+    return client
+
+
+def create_client(db_path, mode="embedded"):
+    """New Chroma client; prefer get_client(), which shares one per process"""
+    if mode == "http":
+        return HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+    if mode != "embedded":
+        raise ValueError(f"Unknown CHROMA_MODE {mode!r}; expected 'embedded' or 'http'")
+    return PersistentClient(path=db_path)
+
+
+class ShardRouter:
+    """Picks the collection holding a destination's chunks.
+
+    Unsharded, every destination lives in the shared base collection and queries filter by
+    destination. Sharded, each destination has its own collection "<base>__<destination>", opened
+    lazily; the handles are lightweight and kept for the life of the router. Sharding narrows each
+    query to one small HNSW index; it does not cap memory, since Chroma keeps loaded indexes in its
+    own cache and dropping a handle does not unload them.
+    """
+
+    def __init__(self, client, base_name, embedding_function, sharded=VECTOR_SHARDING):
+        self.client = client
+        self.base_name = base_name
+        self.embedding_function = embedding_function
+        self.sharded = sharded
+        # Sharded and shared layouts are indexed separately, so they keep separate manifests
+        self.name = f"{base_name}_shards" if sharded else base_name
+        self._shared = None
+        self._open = {}
+
+    def shard_name(self, destination):
+        return f"{self.base_name}__{re.sub(r'[^a-z0-9]+', '_', destination.lower()).strip('_')}"
+
+    def _get_or_create(self, name):
+        return self.client.get_or_create_collection(name=name, embedding_function=self.embedding_function)
+
+    def collection_for(self, destination):
+        if not self.sharded:
+            if self._shared is None:
+                self._shared = self._get_or_create(self.base_name)
+            return self._shared
+        collection = self._open.get(destination)
+        if collection is None:
+            # setdefault: threads racing to open the same shard all end up sharing one handle
+            collection = self._open.setdefault(destination, self._get_or_create(self.shard_name(destination)))
+        return collection
+
+    def route(self, destinations):
+        """[(collection, destinations in it)] covering destinations (all of them when empty)"""
+        if not self.sharded:
+            return [(self.collection_for(None), tuple(destinations))]
+        if not destinations:
+            destinations = self.destinations()
+        return [(self.collection_for(dest), (dest,)) for dest in destinations]
+
+    def destinations(self):
+        """Destinations that have a shard in the store"""
+        prefix = f"{self.base_name}__"
+        names = [getattr(c, "name", c) for c in self.client.list_collections()]
+        return sorted(name[len(prefix):] for name in names if name.startswith(prefix))
+
+    def collections(self):
+        """Every collection holding chunks for this store"""
+        if not self.sharded:
+            return [self.collection_for(None)]
+        return [self.collection_for(dest) for dest in self.destinations()]
@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+WARMUP_WORKERS = int(os.getenv("WARMUP_WORKERS", "2"))
+WARMUP_LLM = os.getenv("WARMUP_LLM", "1") == "1"
+
+
+class WarmupManager:
+    """Indexes/loads every known destination in the background and reports readiness"""
+
+    def __init__(self, destination_agent, llm_agents=(), workers=WARMUP_WORKERS, exercise_llm=WARMUP_LLM):
+        self.destination_agent = destination_agent
+        self.llm_agents = list(llm_agents) or [destination_agent]
+        self.workers = max(1, workers)
+        self.exercise_llm = exercise_llm
+        self.ready = threading.Event()
+        self.status = {}
+        self.started_at = None
+        self.finished_at = None
+        self._thread = None
+
+    def start(self):
+        """Kick off warm-up without blocking the caller; safe to call more than once"""
+        if self._thread is None:
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def _warm_destination(self, destination):
+        start = time.perf_counter()
+        if not self.destination_agent.ensure_destination_loaded(destination):
+            raise ValueError("no matching PDF")
+        # A real query pages the HNSW index and embedding cache into memory
+        self.destination_agent.get_relevant_documents(f"best time to visit {destination}", destination=destination)
+        return time.perf_counter() - start
+
+    def _warm_llm(self, agent):
+        start = time.perf_counter()
+        agent.get_response("Reply with the single word: ready")
+        return time.perf_counter() - start
+
+    def _run(self):
+        tasks = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="warmup") as pool:
+            for destination in self.destination_agent.available_destinations():
+                self.status[destination] = "pending"
+                tasks[pool.submit(self._warm_destination, destination)] = destination
+            if self.exercise_llm:
+                for agent in self.llm_agents:
+                    key = f"llm:{agent.name}"
+                    self.status[key] = "pending"
+                    tasks[pool.submit(self._warm_llm, agent)] = key
+            for future in as_completed(tasks):
+                key = tasks[future]
+                try:
+                    self.status[key] = f"ready ({future.result():.1f}s)"
+                except Exception as e:
+                    # A failed warm-up only means that request pays the cold cost later
+                    self.status[key] = f"failed: {e}"
+                print(f"[warmup] {key}: {self.status[key]}")
+        self.finished_at = time.time()
+        self.ready.set()
+
+    def report(self):
+        return {
+            "ready": self.ready.is_set(),
+            "started": self.started_at is not None,
+            "seconds": (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0,
+            "status": dict(self.status),
+        }
@@ -0,0 +1,242 @@
+"""ASGI entry point for serving many concurrent conversations from one process.
+
+Usage (from backend/):
+    uvicorn asgi:app --loop uvloop --host 0.0.0.0 --port 5002
+
+The chat endpoints (/api/destination, /api/expert, /api/itinerary and their /stream
+variants) await the agents' async paths: agno's arun, async Ollama embeddings and
+Reddit over httpx. Every other route (static files, /api/stats, /api/ready) is served
+by the Flask app in main.py, which also provides the agents and the history store.
+"""
+import asyncio
+import json
+import uuid
+from http.cookies import SimpleCookie
+
+from itsdangerous import BadSignature
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+import main
+from agents.timing import StageTimer
+
+flask_app = WSGIMiddleware(main.app)
+# Same signed cookie as Flask's session, so both serving modes share the session id
+session_serializer = main.app.session_interface.get_signing_serializer(main.app)
+SESSION_COOKIE = main.app.config["SESSION_COOKIE_NAME"]
+SESSION_MAX_AGE = int(main.app.permanent_session_lifetime.total_seconds())
+
+
+class Request:
+    def __init__(self, scope, receive):
+        self.scope = scope
+        self.receive = receive
+        self.headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        self.session = self._load_session()
+        self.new_session = "sid" not in self.session
+        self.sid = self.session.setdefault("sid", uuid.uuid4().hex)
+
+    def _load_session(self):
+        morsel = SimpleCookie(self.headers.get("cookie", "")).get(SESSION_COOKIE)
+        if morsel is None:
+            return {}
+        try:
+            return dict(session_serializer.loads(morsel.value, max_age=SESSION_MAX_AGE))
+        except BadSignature:
+            return {}
+
+    async def json(self):
+        body, more = b"", True
+        while more:
+            message = await self.receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        return json.loads(body or b"{}")
+
+    def response_headers(self, content_type):
+        headers = [(b"content-type", content_type)]
+        if self.new_session:
+            self.session["_permanent"] = True
+            cookie = (
+                f"{SESSION_COOKIE}={session_serializer.dumps(self.session)}; "
+                f"Max-Age={SESSION_MAX_AGE}; Path=/; HttpOnly; SameSite=Lax"
+            )
+            headers.append((b"set-cookie", cookie.encode("latin-1")))
+        if self.headers.get("origin") == main.CORS_ORIGIN:
+            headers.append((b"access-control-allow-origin", main.CORS_ORIGIN.encode("latin-1")))
+            headers.append((b"vary", b"Origin"))
+        return headers
+
+
+async def send_json(request, send, payload, status=200):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": request.response_headers(b"application/json"),
+    })
+    await send({"type": "http.response.body", "body": json.dumps(payload).encode("utf-8")})
+
+
+async def send_events(request, send, events):
+    headers = request.response_headers(b"text/event-stream")
+    headers += [(b"cache-control", b"no-cache"), (b"x-accel-buffering", b"no")]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    async for event in events:
+        await send({"type": "http.response.body", "body": event.encode("utf-8"), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def event_stream(chunks, timer, on_complete=None, **final):
+    """Async twin of main.event_stream"""
+    parts = []
+    try:
+        with timer.stage("generate"):
+            async for chunk in chunks:
+                timer.mark("first_token")
+                parts.append(chunk)
+                yield main.sse({'delta': chunk})
+    except Exception as e:
+        yield main.sse({'error': str(e)}, event='error')
+        return
+    response = "".join(parts)
+    if on_complete:
+        await on_complete(response)
+    timings = timer.report()
+    yield main.sse(dict(final, response=response, timings=timings), event='done')
+
+
+class DestinationTurn:
+    """One destination chat request: its prompt, or an answer from the semantic cache"""
+
+    def __init__(self, message, destination=None, prompt=None, cache_ttl=None, cache_handle=None, cached=None):
+        self.message = message
+        self.destination = destination
+        self.prompt = prompt
+        self.cache_ttl = cache_ttl
+        self.cache_handle = cache_handle
+        self.cached = cached
+
+
+async def destination_turn(request, data, endpoint, timer):
+    agent = main.destination_agent
+    message = data.get('message', '')
+    history = await asyncio.to_thread(main.history_store.get, request.sid, 4)
+    interest_type = main.interest_type_for(message)
+    if interest_type:
+        return DestinationTurn(
+            message, prompt=agent.greeting_prompt(interest_type), cache_ttl=agent.response_cache_ttl(interest_type)
+        )
+    destination = agent.extract_destination(message)
+    usePdf = data.get('usePdf', False)
+    with timer.stage("semantic_cache"):
+        cache_handle, cached = await agent.asemantic_lookup(
+            endpoint, destination, history, message, usePdf, data.get('ragMode')
+        )
+    if cached is not None:
+        return DestinationTurn(message, destination, cached=cached)
+    prompt = await agent.ainsights_prompt(
+        destination=destination,
+        history=history,
+        query=message,
+        usePdf=usePdf,
+        rag_mode=data.get('ragMode'),
+        timer=timer
+    )
+    return DestinationTurn(message, destination, prompt, agent.response_cache_ttl(usePdf=usePdf), cache_handle)
+
+
+async def destination(request, send):
+    timer = StageTimer()
+    turn = await destination_turn(request, await request.json(), 'destination', timer)
+    response = turn.cached
+    if response is None:
+        with timer.stage("generate"):
+            response = await main.destination_agent.aget_response(turn.prompt, cache_ttl=turn.cache_ttl)
+        main.destination_agent.semantic_store(turn.cache_handle, response)
+    timings = timer.report()
+    await asyncio.to_thread(main.history_store.append, request.sid, turn.message, response)
+    await send_json(request, send, {'response': response, 'destination': turn.destination, 'timings': timings})
+
+
+async def cached_chunks(text):
+    yield text
+
+
+async def destination_stream(request, send):
+    timer = StageTimer()
+    turn = await destination_turn(request, await request.json(), 'destination_stream', timer)
+
+    async def record(response):
+        await asyncio.to_thread(main.history_store.append, request.sid, turn.message, response)
+        main.destination_agent.semantic_store(turn.cache_handle, response)
+
+    if turn.cached is not None:
+        chunks = cached_chunks(turn.cached)
+    else:
+        chunks = main.destination_agent.astream_response(turn.prompt, cache_ttl=turn.cache_ttl)
+    await send_events(request, send, event_stream(chunks, timer, on_complete=record, destination=turn.destination))
+
+
+async def expert(request, send):
+    data = await request.json()
+    response = await main.expert_agent.aget_travel_insights(
+        query=data.get('query', ''), location=data.get('location', '')
+    )
+    await send_json(request, send, response)
+
+
+async def expert_stream(request, send):
+    data = await request.json()
+    timer = StageTimer()
+    with timer.stage("reddit"):
+        prompt = await main.expert_agent.ainsights_prompt(
+            query=data.get('query', ''), location=data.get('location', '')
+        )
+    await send_events(request, send, event_stream(main.expert_agent.astream_response(prompt), timer))
+
+
+async def itinerary(request, send):
+    prompt, error = main.itinerary_prompt(await request.json())
+    if error:
+        return await send_json(request, send, *error)
+    try:
+        result = await main.itinerary_agent.aget_response(prompt)
+    except Exception as e:
+        return await send_json(request, send, {"error": str(e)}, 500)
+    await send_json(request, send, {'itinerary': result})
+
+
+async def itinerary_stream(request, send):
+    prompt, error = main.itinerary_prompt(await request.json())
+    if error:
+        return await send_json(request, send, *error)
+    await send_events(request, send, event_stream(main.itinerary_agent.astream_response(prompt), StageTimer()))
+
+
+ROUTES = {
+    ("POST", "/api/destination"): destination,
+    ("POST", "/api/destination/stream"): destination_stream,
+    ("POST", "/api/expert"): expert,
+    ("POST", "/api/expert/stream"): expert_stream,
+    ("POST", "/api/itinerary"): itinerary,
+    ("POST", "/api/itinerary/stream"): itinerary_stream,
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    handler = ROUTES.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+    if handler is None:
+        # CORS preflight, static files and the remaining API routes
+        return await flask_app(scope, receive, send)
+    await handler(Request(scope, receive), send)
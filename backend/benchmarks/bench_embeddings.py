@@ -0,0 +1,75 @@
+"""Compare embedding providers on query latency and ingest throughput.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embeddings --providers ollama,onnx --pdf agents/data/austria.pdf
+"""
+import argparse
+import statistics
+import time
+
+from agents.chunker import StructuredChunker
+from agents.embeddings import get_embedding_provider
+from agents.pdf_parsing import load_and_split
+
+QUERIES = [
+    "best time to visit Austria",
+    "what to eat in Italy",
+    "hiking trails near Interlaken",
+    "is Paris expensive for students",
+    "how do trains work between Zurich and Milan",
+    "Hallstatt day trip from Salzburg",
+    "Cinque Terre in October",
+    "museums in Vienna",
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bench_queries(provider, rounds):
+    provider(QUERIES[:1])  # warm the model / connection
+    latencies = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            provider([query])
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "query_p50_ms": statistics.median(latencies),
+        "query_p95_ms": percentile(latencies, 95),
+    }
+
+
+def bench_ingest(provider, chunks, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(chunks), batch_size):
+        provider(chunks[i:i + batch_size])
+    elapsed = time.perf_counter() - start
+    return {"ingest_chunks": len(chunks), "ingest_seconds": elapsed, "ingest_chunks_per_s": len(chunks) / elapsed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--providers", default="ollama,onnx")
+    parser.add_argument("--pdf", default="agents/data/austria.pdf")
+    parser.add_argument("--max-chunks", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    chunks = [doc.page_content for doc in load_and_split(args.pdf, StructuredChunker())][:args.max_chunks]
+
+    for name in args.providers.split(","):
+        provider = get_embedding_provider(name.strip())
+        result = bench_queries(provider, args.rounds)
+        result.update(bench_ingest(provider, chunks, args.batch_size))
+        print(f"{name:>8}: " + ", ".join(
+            f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in result.items()
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compare Chroma HNSW and the memory-mapped NumPy backend on search latency and RSS.
+
+Usage (from backend/, after build_index.py):
+    python -m benchmarks.bench_vector_search [--backends chroma,chroma-sharded,numpy] [--dtype float16]
+
+Each backend runs in its own subprocess so resident memory is measured in isolation.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+QUERIES = [
+    "best time to visit",
+    "local food specialities",
+    "hiking and mountain trails",
+    "museums and galleries",
+    "getting around by train",
+    "budget tips for travellers",
+]
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc, falling back to peak RSS)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_backend(backend, dtype, rounds, k):
+    os.environ["VECTOR_BACKEND"] = "numpy" if backend == "numpy" else "chroma"
+    # chroma-sharded searches one collection per destination (indexed on first run)
+    os.environ["VECTOR_SHARDING"] = "1" if backend == "chroma-sharded" else "0"
+    os.environ["VECTOR_DTYPE"] = dtype
+    from agents.destin_agent import DestinationAgent
+
+    agent = DestinationAgent(pdf_path="agents/data/")
+    destinations = agent.available_destinations()
+    for destination in destinations:
+        agent.ensure_destination_loaded(destination)
+    embeddings = agent.embedder(QUERIES)
+    rss_before = rss_mb()
+
+    latencies = []
+    for _ in range(rounds):
+        for destination in destinations:
+            for embedding in embeddings:
+                start = time.perf_counter()
+                if backend == "numpy":
+                    agent.vector_index.search(embedding, k, {destination})
+                else:
+                    agent.router.collection_for(destination).query(
+                        query_embeddings=[embedding],
+                        n_results=k,
+                        where=None if agent.router.sharded else {"destination": destination},
+                        include=["documents", "metadatas", "distances"]
+                    )
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "dtype": dtype if backend == "numpy" else "-",
+        "searches": len(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "rss_mb": rss_mb(),
+        "rss_search_delta_mb": rss_mb() - rss_before,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default="chroma,numpy")
+    parser.add_argument("--dtype", default="float32")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("-k", type=int, default=9)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_backend(args.child, args.dtype, args.rounds, args.k)))
+        return
+
+    for backend in args.backends.split(","):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_vector_search", "--child", backend,
+             "--dtype", args.dtype, "--rounds", str(args.rounds), "-k", str(args.k)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(", ".join(
+            f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in result.items()
+        ))
+
+
+if __name__ == "__main__":
+    main()
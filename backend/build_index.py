@@ -0,0 +1,91 @@
+"""Build the destination_docs vector store ahead of deploy.
+
+Usage (from backend/):
+    python build_index.py [--force] [--snapshot-dir index_snapshots]
+
+Indexes every PDF in the data directory, verifies each destination's rows
+against the ingestion manifest and writes a versioned copy of the store.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from agents.destin_agent import DestinationAgent
+
+
+def verify(agent, destinations):
+    """Check row counts against the manifest and that each destination is queryable"""
+    problems = []
+    for destination in destinations:
+        entry = agent.manifest.get(destination)
+        if not entry:
+            problems.append(f"{destination}: missing from manifest")
+            continue
+        rows = agent.router.collection_for(destination).get(where={"destination": destination}, include=[])
+        if len(rows["ids"]) != entry["chunks"]:
+            problems.append(f"{destination}: {len(rows['ids'])} rows, manifest says {entry['chunks']}")
+            continue
+        docs = agent.get_relevant_documents(f"travel in {destination}", destination=destination)
+        if not docs:
+            problems.append(f"{destination}: query returned no documents")
+    return problems
+
+
+def write_snapshot(db_path, snapshot_dir, manifest):
+    """Copy the store into a versioned directory and point LATEST at it"""
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{digest}"
+    target = os.path.join(snapshot_dir, version)
+    shutil.copytree(db_path, target, ignore=shutil.ignore_patterns(".locks", "*.tmp"))
+    with open(os.path.join(target, "snapshot.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": version, "created_at": time.time(), "destinations": manifest}, f, indent=2)
+    with open(os.path.join(snapshot_dir, "LATEST"), "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prebuild the destination vector store")
+    parser.add_argument("--data-dir", default="agents/data/")
+    parser.add_argument("--db-path", help="defaults to CHROMA_DB_PATH or backend/chroma_db")
+    parser.add_argument("--snapshot-dir", default="index_snapshots")
+    parser.add_argument("--force", action="store_true", help="reindex even if the manifest is current")
+    parser.add_argument("--no-snapshot", action="store_true")
+    args = parser.parse_args(argv)
+
+    agent = DestinationAgent(pdf_path=args.data_dir, db_path=args.db_path)
+    destinations = agent.available_destinations()
+    if not destinations:
+        print(f"No PDFs found in {args.data_dir}")
+        return 1
+
+    for destination in destinations:
+        start = time.perf_counter()
+        if not agent.ensure_destination_loaded(destination, force=args.force):
+            print(f"[build] {destination}: no matching PDF")
+            return 1
+        print(f"[build] {destination}: ready in {time.perf_counter() - start:.1f}s")
+
+    problems = verify(agent, destinations)
+    if problems:
+        for problem in problems:
+            print(f"[verify] {problem}")
+        return 1
+    print(f"[verify] {len(destinations)} destinations OK")
+
+    # Ship the memory-mapped matrix too, so VECTOR_BACKEND=numpy pods start warm
+    agent.vector_index.build(*agent.router.collections())
+    print(f"[build] wrote {agent.vector_index.matrix_path} ({len(agent.vector_index.ids)} rows)")
+
+    if not args.no_snapshot:
+        target = write_snapshot(agent.db_path, args.snapshot_dir, agent.manifest.entries())
+        print(f"[snapshot] wrote {target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
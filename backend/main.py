@@ -1,14 +1,22 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, Response, request, jsonify, session, stream_with_context
 from flask_cors import CORS
 from agents import DestinationAgent, ItineraryAgent, ExpertAgent
+from agents.history import HistoryStore
+from agents.llm_pool import get_llm_registry
+from agents.response_cache import get_response_cache
+from agents.singleflight import flight_stats
+from agents.timing import StageTimer
+from agents.warmup import WarmupManager
 import os
 import re
 import wave
 import json
+import uuid
 
 app = Flask(__name__, static_folder='dist', static_url_path='/') 
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-2023')
-CORS(app, resources={r"/api/*": {"origins": "https://travel-agent-ai-production.up.railway.app"}})
+CORS_ORIGIN = "https://travel-agent-ai-production.up.railway.app"
+CORS(app, resources={r"/api/*": {"origins": CORS_ORIGIN}})
 
 from flask import send_from_directory
 
@@ -20,6 +28,8 @@ def serve_index():
 pdf_path = "agents/data/"
 destination_agent = DestinationAgent(pdf_path=pdf_path)
 expert_agent = ExpertAgent()
+# Server-side conversation turns keyed by the session id, shared by every worker
+history_store = HistoryStore()
 
 @app.route('/static/images/default_avatar.png')
 @app.route('/static/images/default_project.jpg')
@@ -34,38 +44,132 @@ def block_default_images():
 @app.before_request
 def make_session_permanent():
     session.permanent = True
-    session.setdefault('history', [])
+    session.setdefault('sid', uuid.uuid4().hex)
+
+def interest_type_for(message):
+    if any(k in message.lower() for k in ['culture', 'history', 'art']):
+        return 'culture'
+    if any(k in message.lower() for k in ['food', 'eat']):
+        return 'food'
+    if any(k in message.lower() for k in ['nature', 'hiking', 'green']):
+        return 'nature'
+    return None
+
+def sse(payload, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n"
+
+def event_stream(chunks, timer, on_complete=None, **final):
+    """Relay generated text as SSE "data" events, then one "done" event with the full response.
+
+    on_complete runs after the last token, e.g. to record the turn in the history store.
+    """
+    parts = []
+    try:
+        with timer.stage("generate"):
+            for chunk in chunks:
+                timer.mark("first_token")
+                parts.append(chunk)
+                yield sse({'delta': chunk})
+    except Exception as e:
+        yield sse({'error': str(e)}, event='error')
+        return
+    response = "".join(parts)
+    if on_complete:
+        on_complete(response)
+    timings = timer.report()
+    yield sse(dict(final, response=response, timings=timings), event='done')
+
+def sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        # Stop proxies (nginx) from buffering the stream until it ends
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/destination', methods=['POST'])
 def destination_endpoint():
     data = request.json
     usePdf = data.get('usePdf', False)
     message = data.get('message', '')
-    history = session['history'][-4:]
-    
+    history = history_store.get(session['sid'], 4)
+    timer = StageTimer()
+
+    destination = None
     # Determine interest type
-    interest_type = None
-    if any(k in message.lower() for k in ['culture', 'history', 'art']):
-        interest_type = 'culture'
-    elif any(k in message.lower() for k in ['food', 'eat']):
-        interest_type = 'food'
-    elif any(k in message.lower() for k in ['nature', 'hiking', 'green']):
-        interest_type = 'nature'
+    interest_type = interest_type_for(message)
     
     if interest_type:
         response = destination_agent.greet(interest_type)
     else:
         destination = destination_agent.extract_destination(message)
-        response = destination_agent.get_destination_insights(
+        with timer.stage("semantic_cache"):
+            cache_handle, response = destination_agent.semantic_lookup(
+                'destination', destination, history, message, usePdf, data.get('ragMode')
+            )
+        if response is None:
+            response = destination_agent.get_destination_insights(
+                destination=destination,
+                history=history,
+                query=message, 
+                usePdf=usePdf,
+                rag_mode=data.get('ragMode'),
+                timer=timer
+            )
+            destination_agent.semantic_store(cache_handle, response)
+
+    timings = timer.report()
+    history_store.append(session['sid'], message, response)
+    return jsonify({'response': response, 'destination': destination, 'timings': timings})
+
+@app.route('/api/destination/stream', methods=['POST'])
+def destination_stream_endpoint():
+    data = request.json
+    message = data.get('message', '')
+    sid = session['sid']
+    history = history_store.get(sid, 4)
+    timer = StageTimer()
+
+    destination = None
+    cache_handle = None
+    interest_type = interest_type_for(message)
+
+    def record(response):
+        history_store.append(sid, message, response)
+        destination_agent.semantic_store(cache_handle, response)
+
+    if interest_type:
+        prompt = destination_agent.greeting_prompt(interest_type)
+    else:
+        destination = destination_agent.extract_destination(message)
+        with timer.stage("semantic_cache"):
+            cache_handle, cached = destination_agent.semantic_lookup(
+                'destination_stream', destination, history, message, data.get('usePdf', False), data.get('ragMode')
+            )
+        if cached is not None:
+            return sse_response(event_stream(
+                iter([cached]),
+                timer,
+                on_complete=lambda response: history_store.append(sid, message, response),
+                destination=destination
+            ))
+        # Retrieval (and the chained PDF answer) finish before the first token is streamed
+        prompt = destination_agent.insights_prompt(
             destination=destination,
             history=history,
-            query=message, 
-            usePdf=usePdf
+            query=message,
+            usePdf=data.get('usePdf', False),
+            rag_mode=data.get('ragMode'),
+            timer=timer
         )
-
-    session['history'].append({"user": message, "bot": response})
-    session.modified = True
-    return jsonify({'response': response, 'destination': destination})
+    cache_ttl = destination_agent.response_cache_ttl(interest_type, data.get('usePdf', False))
+    return sse_response(event_stream(
+        destination_agent.stream_response(prompt, cache_ttl=cache_ttl),
+        timer,
+        on_complete=record,
+        destination=destination
+    ))
 
 @app.route('/api/expert', methods=['POST'])
 def expert_endpoint():
@@ -75,6 +179,14 @@ def expert_endpoint():
     response = expert_agent.get_travel_insights(query=query, location=location)
     return jsonify(response)
 
+@app.route('/api/expert/stream', methods=['POST'])
+def expert_stream_endpoint():
+    data = request.json
+    timer = StageTimer()
+    with timer.stage("reddit"):
+        prompt = expert_agent.insights_prompt(query=data.get('query', ''), location=data.get('location', ''))
+    return sse_response(event_stream(expert_agent.stream_response(prompt), timer))
+
 '''
 @app.route('/api/destination', methods=['POST'])
 
@@ -147,33 +259,68 @@ def destination_audio_endpoint():
 
 itinerary_agent = ItineraryAgent()
 
-@app.route('/api/itinerary', methods=['POST'])
-def itinerary_endpoint():
-    data = request.json
+# Optional background warm-up: index destinations and prime the LLM client without blocking startup
+warmup = WarmupManager(destination_agent, llm_agents=[destination_agent, expert_agent, itinerary_agent])
+if os.environ.get('WARMUP_ON_START', '0') == '1':
+    warmup.start()
+
+@app.route('/api/stats', methods=['GET'])
+def stats_endpoint():
+    return jsonify({
+        'retrieval_cache': destination_agent.retrieval_cache.stats(),
+        'embedding_cache': destination_agent.embedder.cache.stats(),
+        'query_rewriter': destination_agent.query_rewriter.stats(),
+        'llm_pool': get_llm_registry().stats(),
+        'response_cache': get_response_cache().stats(),
+        'semantic_cache': destination_agent.semantic_cache.stats(),
+        'single_flight': flight_stats(),
+    })
+
+@app.route('/api/ready', methods=['GET'])
+def ready_endpoint():
+    report = warmup.report()
+    # Without warm-up the server is ready as soon as it accepts requests
+    is_ready = report['ready'] or not report['started']
+    return jsonify(report), 200 if is_ready else 503
+
+def itinerary_prompt(data):
+    """(prompt, None) or (None, (error payload, status)) for an itinerary request body"""
+    destinations = data.get('destinations', [])
+    if not destinations and 'destination' in data:
+        destinations = [data['destination']]
+    if not destinations:
+        return None, ({"error": "At least one destination is required"}, 400)
+    if any(not d.strip() for d in destinations):
+        return None, ({"error": "Destination names cannot be empty"}, 400)
     try:
-        trip_type = data.get('trip_type', 'city')
-        destinations = data.get('destinations', [])
-        pace = data.get('pace', 3) 
-        
-        if not destinations and 'destination' in data:
-            destinations = [data['destination']]
-        
-        if not destinations:
-            return jsonify({"error": "At least one destination is required"}), 400
-        if any(not d.strip() for d in destinations):
-            return jsonify({"error": "Destination names cannot be empty"}), 400
-        
-        result = itinerary_agent.plan_trip(
+        return itinerary_agent.trip_prompt(
             from_city=data['origin'],
             destinations=destinations,
             interests=data['interests'],
             date_from=data['date_from'],
             date_to=data['date_to'],
-            pace=pace
-        )
+            pace=data.get('pace', 3)
+        ), None
+    except Exception as e:
+        return None, ({"error": str(e)}, 500)
+
+@app.route('/api/itinerary', methods=['POST'])
+def itinerary_endpoint():
+    prompt, error = itinerary_prompt(request.json)
+    if error:
+        return jsonify(error[0]), error[1]
+    try:
+        result = itinerary_agent.get_response(prompt)
         return jsonify({'itinerary': result})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/itinerary/stream', methods=['POST'])
+def itinerary_stream_endpoint():
+    prompt, error = itinerary_prompt(request.json)
+    if error:
+        return jsonify(error[0]), error[1]
+    return sse_response(event_stream(itinerary_agent.stream_response(prompt), StageTimer()))
+
 if __name__ == "__main__":
     app.run(port=5002, debug=True)
@@ -0,0 +1,82 @@
+import importlib.util
+import os
+
+import pytest
+
+# Load the module by path: importing the agents package pulls in every agent and its dependencies
+_spec = importlib.util.spec_from_file_location(
+    "resolver", os.path.join(os.path.dirname(__file__), os.pardir, "agents", "resolver.py")
+)
+resolver = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(resolver)
+
+
+@pytest.fixture
+def destinations(tmp_path):
+    for name in ("Austria", "France", "Italy", "Switzerland"):
+        (tmp_path / f"{name}.pdf").write_bytes(b"")
+    return resolver.DestinationResolver(str(tmp_path))
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Austria", "austria"),
+    ("tell me about Zürich", "switzerland"),
+    ("the French Riviera", "france"),
+    ("a week in the Swiss Alps", "switzerland"),
+    ("What to see in Mont Saint-Michel?", "france"),
+])
+def test_resolves_names_aliases_and_cities(destinations, text, expected):
+    assert destinations.resolve(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("itlay", "italy"),
+    ("swizterland", "switzerland"),
+    ("Salzberg", "austria"),
+    ("frnace trip", "france"),
+    ("what should I do in Salzberg this summer", "austria"),
+])
+def test_fuzzy_matches_typos_of_names(destinations, text, expected):
+    assert destinations.resolve(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "Australia",
+    "Austin",
+    "what parts are best for hiking",
+    "I like basil pesto",
+    "Is it good for swims",
+])
+def test_fuzzy_ignores_other_places_and_ordinary_words(destinations, text):
+    assert destinations.resolve(text) is None
+
+
+def test_resolve_all_keeps_order_of_mention(destinations):
+    assert destinations.resolve_all("compare Switzerland and Austria") == ["switzerland", "austria"]
+    assert destinations.resolve_all("Rome, Florence and Venice") == ["italy"]
+    assert destinations.resolve_all("") == []
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("italy", "itlay", True),
+    ("paris", "pariss", True),
+    ("basel", "basle", True),
+    ("austria", "australia", False),
+    ("austria", "austin", False),
+    ("geneva", "geneva", True),
+])
+def test_within_one_edit(a, b, expected):
+    assert resolver.within_one_edit(a, b) is expected
+    assert resolver.within_one_edit(b, a) is expected
+
+
+def test_name_terms_are_the_guide_names_only(destinations):
+    assert destinations.name_terms(["austria"]) == {"austria"}
+    assert destinations.name_terms() == {"austria", "france", "italy", "switzerland"}
+
+
+def test_resolve_name_reports_the_matched_alias(destinations):
+    assert destinations.resolve_name("when should I go to Vienna") == ("austria", "vienna")
+    assert destinations.resolve_name("best season for Vienna?") == ("austria", "vienna")
+    assert destinations.resolve_name("Salzberg") == ("austria", "salzburg")
+    assert destinations.resolve_name("somewhere warm") is None